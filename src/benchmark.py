@@ -0,0 +1,318 @@
+'''
+Benchmarks and golden-set checks for the OCR pipeline.
+
+A golden set is a folder of RFI images plus an optional golden.json mapping
+each image stem to its expected cleaned values: {"<stem>": {"X": [...], "Y": [...]}}.
+
+Usage:
+    python src/benchmark.py montage <golden_dir> [--tiles N]
+    python src/benchmark.py glyph-bank <golden_dir> <bank.npz>
+    python src/benchmark.py profiles <golden_dir>
+    python src/benchmark.py decode <golden_dir>
+    python src/benchmark.py signature <image> [<image> ...]
+    python src/benchmark.py vh-prototypes <labeled_dir> <prototypes.npz>
+    python src/benchmark.py encode <image_dir>
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+from black_roi.blackening_roi import REDACT_REGION, black_roi
+from black_roi.folder_importer import OUTPUT_PROFILES, output_suffix, save_processed_image
+from black_roi.jpeg_redact import JPEG_SUFFIXES, redact_jpeg
+from ocr_process import digit_recognizer, montage
+from ocr_process.image_processor import (
+    DECODE_MODES, IMAGE_EXTENSIONS, ROI_Y_HEADER_LINES, decode_frame, decode_roi_rows, process_roi_x, process_roi_y
+)
+from ocr_process.ocr_cache import cache_disabled
+from ocr_process.ocr_pipeline import ocr_image_files
+from ocr_process.ocr_profiles import PROFILES, prepare_roi
+from ocr_process.sheet_templates import header_signature
+from ocr_process.vh_classifier import build_prototypes, classify, layout_features, save_prototypes, split_stem
+from ocr_process.text_cleaner import clean_text
+from ocr_process.text_extractor import _recognize_many, extract_from_image
+
+
+# === Golden Set ===
+def load_golden(golden_dir: Path):
+    """Return the sorted image paths of a golden set and its expected values (or None)."""
+    images = sorted(p for p in golden_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    golden_file = golden_dir / "golden.json"
+    expected = json.loads(golden_file.read_text(encoding="utf-8")) if golden_file.exists() else None
+    return images, expected
+
+
+def exact_matches(results: dict, expected: dict) -> int:
+    """Count images whose X and Y values both match the golden values exactly."""
+    return sum(
+        1 for stem, values in results.items()
+        if stem in expected
+        and values["X"] == expected[stem].get("X", [])
+        and values["Y"] == expected[stem].get("Y", [])
+    )
+
+
+def timed_ocr(images, **kwargs):
+    """Run ocr_image_files quietly and return (results dict, seconds, run counters)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # clean_text prints every value
+        results, stats = ocr_image_files(images, **kwargs)
+    return dict(results), time.perf_counter() - start, stats
+
+
+# === Commands ===
+def bench_montage(args):
+    images, expected = load_golden(args.golden_dir)
+    # Uncached, or every run after the first would be timed on cache hits
+    with cache_disabled():
+        per_roi, per_roi_time, _ = timed_ocr(images, ocr_mode="per_roi")
+        tiled, tiled_time, _ = timed_ocr(images, ocr_mode="montage", montage_tiles=args.tiles)
+
+    mismatches = [stem for stem in per_roi if per_roi[stem] != tiled.get(stem)]
+    print(f"Images:          {len(images)}")
+    print(f"per_roi:         {per_roi_time:.2f}s ({per_roi_time / max(len(images), 1) * 1000:.1f} ms/image)")
+    print(f"montage ({args.tiles:>3}):   {tiled_time:.2f}s ({tiled_time / max(len(images), 1) * 1000:.1f} ms/image)")
+    print(f"Mismatches:      {len(mismatches)}")
+    for stem in mismatches:
+        print(f"  {stem}: per_roi={per_roi[stem]} montage={tiled.get(stem)}")
+    if expected:
+        print(f"Golden matches:  per_roi {exact_matches(per_roi, expected)}/{len(expected)}, "
+              f"montage {exact_matches(tiled, expected)}/{len(expected)}")
+    return 1 if mismatches else 0
+
+
+def build_glyph_bank(args):
+    """Learn glyph templates from golden pages whose Tesseract output cleans to the golden values."""
+    images, expected = load_golden(args.golden_dir)
+    if not expected:
+        print("golden.json is required to select trustworthy samples.")
+        return 1
+
+    samples = []
+    for image_path in images:
+        img = cv2.imread(str(image_path))
+        if img is None or image_path.stem not in expected:
+            continue
+        roi_x, roi_y = process_roi_x(img), process_roi_y(img)
+        text_x, text_y = extract_from_image(roi_x, roi_y)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cleaned_x, cleaned_y = clean_text(text_x, text_y)
+        if [cleaned_x, cleaned_y] == [expected[image_path.stem].get("X", []), expected[image_path.stem].get("Y", [])]:
+            samples += [(roi_x, text_x), (roi_y, text_y)]
+
+    bank = digit_recognizer.build_glyph_bank(samples)
+    bank.save(str(args.output))
+    print(f"Saved {len(bank.labels)} glyph templates ({''.join(bank.labels)}) "
+          f"from {len(samples) // 2} page(s) to {args.output}")
+    return 0
+
+
+def bench_profiles(args):
+    """Per-profile latency and exact-match rate, separately for ROI_X and ROI_Y."""
+    images, expected = load_golden(args.golden_dir)
+    if not expected:
+        print("golden.json is required to measure exact-match rates.")
+        return 1
+
+    stems, rois = [], {"X": [], "Y": []}
+    for image_path in images:
+        img = cv2.imread(str(image_path))
+        if img is None or image_path.stem not in expected:
+            continue
+        stems.append(image_path.stem)
+        rois["X"].append(process_roi_x(img))
+        rois["Y"].append(process_roi_y(img))
+    if not stems:
+        print("No golden image could be read.")
+        return 1
+
+    print(f"{'Profile':<16}{'ROI':<5}{'ms/ROI':>9}{'exact match':>14}")
+    rows = []
+    for name, profile in PROFILES.items():
+        for kind in ("X", "Y"):
+            prepared = [prepare_roi(roi, profile) for roi in rois[kind]]
+            start = time.perf_counter()
+            # Uncached on purpose: this measures Tesseract itself
+            texts = _recognize_many([roi for roi, _ in prepared], profile)
+            ms_per_roi = (time.perf_counter() - start) / len(stems) * 1000
+
+            matches = 0
+            with contextlib.redirect_stdout(io.StringIO()):
+                for stem, text, (_, cropped) in zip(stems, texts, prepared):
+                    if kind == "X":
+                        values = clean_text(text, "")[0]
+                    else:
+                        values = clean_text("", text, header_lines=ROI_Y_HEADER_LINES - cropped)[1]
+                    matches += values == expected[stem].get(kind, [])
+            rate = matches / len(stems)
+            rows.append((kind, name, ms_per_roi, rate))
+            print(f"{name:<16}{kind:<5}{ms_per_roi:>9.1f}{rate:>13.1%}")
+
+    print()
+    for kind in ("X", "Y"):
+        baseline = next(rate for roi_kind, name, _, rate in rows if roi_kind == kind and name == "default")
+        fastest = min((row for row in rows if row[0] == kind and row[3] >= baseline), key=lambda row: row[2])
+        print(f"Fastest {kind} profile at default accuracy or better: {fastest[1]} "
+              f"({fastest[2]:.1f} ms/ROI, {fastest[3]:.1%}) -> RFI_OCR_PROFILE_{kind}={fastest[1]}")
+    return 0
+
+
+def bench_decode(args):
+    """Decode time, decoded memory and accuracy of the OCR-only run per decode mode."""
+    images, expected = load_golden(args.golden_dir)
+    if not images:
+        print("No golden image found.")
+        return 1
+
+    print(f"{'Mode':<16}{'decode ms':>11}{'OCR run ms':>12}{'KB/page':>10}{'same as color':>15}"
+          + (f"{'exact match':>13}" if expected else ""))
+    reference = None
+    for mode in DECODE_MODES:
+        start = time.perf_counter()
+        for image_path in images:
+            decode_roi_rows(image_path, mode=mode)
+        decode_ms = (time.perf_counter() - start) / len(images) * 1000
+
+        # Uncached: the gray modes threshold to the same stacks as color and would only hit the cache
+        with cache_disabled():
+            results, seconds, stats = timed_ocr(images, decode_mode=mode)
+        reference = reference if reference is not None else results
+        pages = max(stats["images"], 1)
+        same = sum(results[stem] == reference.get(stem) for stem in results) / pages
+        line = (f"{mode:<16}{decode_ms:>11.1f}{seconds / len(images) * 1000:>12.1f}"
+                f"{stats['decoded_bytes'] / pages / 1024:>10.0f}{same:>15.1%}")
+        if expected:
+            line += f"{exact_matches(results, expected) / len(expected):>13.1%}"
+        print(line)
+    print("\nSelect a mode with RFI_DECODE_MODE=<mode> (applies to runs that don't write images).")
+    return 0
+
+
+def print_signatures(args):
+    """Print the header signature of reference pages, for the "signature" field of RFI_TEMPLATES."""
+    for image_path in args.images:
+        img = cv2.imread(str(image_path))
+        if img is None:
+            print(f"{image_path}: unreadable")
+            continue
+        start = time.perf_counter()
+        signature = header_signature(img)
+        print(f"{image_path}: {signature:016x} ({(time.perf_counter() - start) * 1e6:.0f} us)")
+    return 0
+
+
+def build_vh_prototypes(args):
+    """Learn V/H layout prototypes from pages named <base>_V / <base>_H and check them on the same pages."""
+    images, _ = load_golden(args.labeled_dir)
+    samples = []
+    start = time.perf_counter()
+    for image_path in images:
+        orientation = split_stem(image_path.stem)[1]
+        vector = layout_features(image_path) if orientation else None
+        if vector is not None:
+            samples.append((vector, orientation))
+    ms_per_page = (time.perf_counter() - start) / max(len(samples), 1) * 1000
+
+    prototypes = build_prototypes(samples)
+    if len(prototypes) < 2:
+        print("Both _V and _H pages are required.")
+        return 1
+    save_prototypes(prototypes, str(args.output))
+    predictions = [classify(vector, prototypes)[0] for vector, _ in samples]
+    correct = sum(predicted == orientation for predicted, (_, orientation) in zip(predictions, samples))
+    undecided = predictions.count(None)
+    print(f"Saved V/H prototypes from {len(samples)} page(s) to {args.output} ({ms_per_page:.1f} ms/page features)")
+    print(f"Self-check: {correct}/{len(samples)} correct, {undecided} below the margin")
+    return 0
+
+
+def bench_encode(args):
+    """Encode time and file size of the redacted pages per output profile (RFI_OUTPUT_PROFILE)."""
+    images, _ = load_golden(args.image_dir)
+    frames = []
+    for path in images:
+        frame = decode_frame(path)
+        if frame is not None:
+            frames.append((path, black_roi(frame, inplace=True)))
+    if not frames:
+        print("No readable image found.")
+        return 1
+    input_kb = sum(path.stat().st_size for path, _ in frames) / len(frames) / 1024
+
+    print(f"{'Profile':<16}{'encode ms':>11}{'KB/page':>10}{'vs input':>10}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for profile in OUTPUT_PROFILES:
+            seconds, size = 0.0, 0
+            for n, (path, frame) in enumerate(frames):
+                output_path = Path(output_dir) / f"{n}{output_suffix(path, profile)}"
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    save_processed_image(frame, output_path, profile)
+                seconds += time.perf_counter() - start
+                size += output_path.stat().st_size
+            kb = size / len(frames) / 1024
+            print(f"{profile:<16}{seconds / len(frames) * 1000:>11.1f}{kb:>10.0f}{kb / input_kb:>10.0%}")
+
+    # JPEG inputs can skip decoding and encoding entirely (profiles keeping the input's format)
+    jpegs = [path for path, _ in frames if path.suffix.lower() in JPEG_SUFFIXES]
+    if jpegs:
+        start, size, lossless = time.perf_counter(), 0, 0
+        for path in jpegs:
+            redacted = redact_jpeg(path.read_bytes(), (REDACT_REGION,))
+            if redacted is not None:
+                size, lossless = size + len(redacted), lossless + 1
+        seconds = time.perf_counter() - start
+        print(f"{'lossless JPEG':<16}{seconds / len(jpegs) * 1000:>11.1f}{size / max(lossless, 1) / 1024:>10.0f}"
+              f"{'':>10}  ({lossless}/{len(jpegs)} JPEG(s), read + rewrite, no decode)")
+    print("\nSelect a profile with RFI_OUTPUT_PROFILE=<profile> (or in the app's OCR settings).")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RFI OCR benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    montage_cmd = commands.add_parser("montage", help="Compare montage OCR against per-ROI OCR")
+    montage_cmd.add_argument("golden_dir", type=Path)
+    montage_cmd.add_argument("--tiles", type=int, default=montage.DEFAULT_TILES)
+    montage_cmd.set_defaults(func=bench_montage)
+
+    bank_cmd = commands.add_parser("glyph-bank", help="Build the template recognizer's glyph bank")
+    bank_cmd.add_argument("golden_dir", type=Path)
+    bank_cmd.add_argument("output", type=Path)
+    bank_cmd.set_defaults(func=build_glyph_bank)
+
+    profiles_cmd = commands.add_parser("profiles", help="Latency and exact-match rate per OCR profile")
+    profiles_cmd.add_argument("golden_dir", type=Path)
+    profiles_cmd.set_defaults(func=bench_profiles)
+
+    decode_cmd = commands.add_parser("decode", help="Throughput, memory and accuracy per decode mode")
+    decode_cmd.add_argument("golden_dir", type=Path)
+    decode_cmd.set_defaults(func=bench_decode)
+
+    signature_cmd = commands.add_parser("signature", help="Header signatures for the sheet template registry")
+    signature_cmd.add_argument("images", type=Path, nargs="+")
+    signature_cmd.set_defaults(func=print_signatures)
+
+    vh_cmd = commands.add_parser("vh-prototypes", help="Build the V/H page classifier's prototypes")
+    vh_cmd.add_argument("labeled_dir", type=Path)
+    vh_cmd.add_argument("output", type=Path)
+    vh_cmd.set_defaults(func=build_vh_prototypes)
+
+    encode_cmd = commands.add_parser("encode", help="Encode time and file size per output profile")
+    encode_cmd.add_argument("image_dir", type=Path)
+    encode_cmd.set_defaults(func=bench_encode)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
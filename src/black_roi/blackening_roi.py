@@ -1,21 +1,84 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import cv2
 import numpy as np
 
-def black_roi(image: np.ndarray) -> np.ndarray:
+# Region blacked out on the default RFI sheet (x, y, w, h)
+REDACT_REGION = (1, 136, 86, 21)
+
+
+class RedactionMask(NamedTuple):
+    """Boolean mask of the pixels to black out, over the bounding box starting at (x, y)."""
+    x: int
+    y: int
+    mask: np.ndarray
+
+
+@lru_cache(maxsize=64)
+def redaction_mask(regions: Tuple[Tuple[int, int, int, int], ...],
+                   polygons: Tuple[Tuple[Tuple[int, int], ...], ...] = ()) -> Optional[RedactionMask]:
+    """
+    Rasterize rectangles (x, y, w, h) and polygons ((x, y) points) into one mask.
+
+    Only their bounding box is stored, so a mask stays small on full-resolution
+    pages. Masks are cached per layout (e.g. per sheet template); pass tuples.
+    Returns None when there is nothing to redact.
     """
-    Applies a black rectangular region to the given image.
+    xs = [x for x, _, w, _ in regions] + [x + w for x, _, w, _ in regions]
+    ys = [y for _, y, _, h in regions] + [y + h for _, y, _, h in regions]
+    for polygon in polygons:
+        xs += [x for x, _ in polygon] + [x + 1 for x, _ in polygon]
+        ys += [y for _, y in polygon] + [y + 1 for _, y in polygon]
+    if not xs:
+        return None
+
+    left, top = max(0, min(xs)), max(0, min(ys))
+    mask = np.zeros((max(ys) - top, max(xs) - left), dtype=np.uint8)
+    for x, y, w, h in regions:
+        mask[max(0, y - top):y + h - top, max(0, x - left):x + w - left] = 1
+    if polygons:
+        cv2.fillPoly(mask, [np.array(polygon, dtype=np.int32) - (left, top) for polygon in polygons], 1)
+    mask = mask.astype(bool)
+    mask.flags.writeable = False  # shared between calls
+    return RedactionMask(left, top, mask)
+
+
+def apply_mask(image: np.ndarray, redaction: Optional[RedactionMask]) -> np.ndarray:
+    """Black out a precomputed mask in place with a single vectorized assignment."""
+    if redaction is not None:
+        window = image[redaction.y:redaction.y + redaction.mask.shape[0],
+                       redaction.x:redaction.x + redaction.mask.shape[1]]
+        window[redaction.mask[:window.shape[0], :window.shape[1]]] = 0
+    return image
+
+
+def black_roi(image: np.ndarray, regions: Sequence[Tuple[int, int, int, int]] = (REDACT_REGION,),
+              inplace: bool = False, mask: Optional[RedactionMask] = None) -> np.ndarray:
+    """
+    Applies black rectangular regions to the given image.
 
     Args:
         image (np.ndarray): Input image.
+        regions (Sequence[Tuple[int, int, int, int]]): (x, y, w, h) boxes to black out;
+            defaults to the default sheet's region (see ocr_process.sheet_templates).
+        inplace (bool): Modify `image` itself instead of a copy (for callers that own
+            the decoded frame; avoids doubling peak memory on large scans).
+        mask (RedactionMask, optional): Precomputed mask (see redaction_mask) used
+            instead of `regions`, e.g. for polygons.
 
     Returns:
-        np.ndarray: Image with the ROI blacked out.
+        np.ndarray: Image with the ROIs blacked out.
     """
-    x, y, w, h = 1, 136, 86, 21
-    modified = image.copy()
+    modified = image if inplace else image.copy()
+
+    if mask is not None:
+        return apply_mask(modified, mask)
 
-    if len(modified.shape) == 3:  # Color
-        modified[y:y+h, x:x+w, :] = 0
-    else:  # Grayscale
-        modified[y:y+h, x:x+w] = 0
+    for x, y, w, h in regions:
+        if len(modified.shape) == 3:  # Color
+            modified[y:y+h, x:x+w, :] = 0
+        else:  # Grayscale
+            modified[y:y+h, x:x+w] = 0
 
     return modified
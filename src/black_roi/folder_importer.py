@@ -1,21 +1,195 @@
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional
 
+import cv2
 import numpy as np
 import pandas as pd
 from PIL import Image
 
+from black_roi.blackening_roi import REDACT_REGION, black_roi
+from black_roi.jpeg_redact import JPEG_REDACT, redact_jpeg_file
+from ocr_process.image_processor import IMAGE_EXTENSIONS, decode_frame
 
-def process_images(input_folder: Path, process_fn: Callable, output_folder_name="output", ocr_results=None) -> list[str]:
+# Threads decoding, redacting and encoding pages in process_images, and redacting and
+# encoding them in ocr_image_files (PIL and cv2 release the GIL)
+WRITER_WORKERS = int(os.environ.get("RFI_WRITER_WORKERS", 1))
+
+
+# --- Output Encoding ---
+class OutputProfile(NamedTuple):
+    """How processed pages are encoded: a PIL format (None keeps the input's) and PIL save options per format."""
+    format: Optional[str]
+    options: Dict[str, dict]
+
+
+# Compare them with 'benchmark.py encode'
+OUTPUT_PROFILES = {
+    "same": OutputProfile(None, {}),  # input's format, PIL defaults
+    "same_fast": OutputProfile(None, {"PNG": {"compress_level": 1}, "TIFF": {"compression": "raw"},
+                                      "JPEG": {"quality": 90, "subsampling": "4:4:4"}}),
+    "png_fast": OutputProfile("PNG", {"PNG": {"compress_level": 1}}),
+    "png_small": OutputProfile("PNG", {"PNG": {"compress_level": 9, "optimize": True}}),
+    "tiff_raw": OutputProfile("TIFF", {"TIFF": {"compression": "raw"}}),
+    "tiff_lzw": OutputProfile("TIFF", {"TIFF": {"compression": "tiff_lzw"}}),
+    "tiff_deflate": OutputProfile("TIFF", {"TIFF": {"compression": "tiff_adobe_deflate"}}),
+    "jpeg_95": OutputProfile("JPEG", {"JPEG": {"quality": 95, "subsampling": "4:4:4"}}),
+    "jpeg_85": OutputProfile("JPEG", {"JPEG": {"quality": 85, "subsampling": "4:2:0"}}),
+}
+OUTPUT_PROFILE = os.environ.get("RFI_OUTPUT_PROFILE", "same")
+FORMAT_SUFFIXES = {"PNG": ".png", "TIFF": ".tif", "JPEG": ".jpg"}
+
+
+def iter_image_files(root_folder: Path, exclude: Optional[Path] = None) -> Iterator[Path]:
+    """Yield the images under root_folder (one walk), skipping the `exclude` subtree."""
+    for root, dirs, files in os.walk(root_folder):
+        root_path = Path(root)
+        if exclude is not None:
+            dirs[:] = [d for d in dirs if root_path / d != exclude]
+        for file in files:
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                yield root_path / file
+
+
+def build_manifest(file_paths: Iterable[Path], folders: Iterable[Path] = ()) -> list[Path]:
+    """
+    Build the list of images to process once at ingest: the image files among
+    file_paths plus every image under folders (e.g. extracted archives), without duplicates.
+    """
+    manifest = {}
+    for path in file_paths:
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
+            manifest.setdefault(path, None)
+    for folder in folders:
+        for path in iter_image_files(folder):
+            manifest.setdefault(path, None)
+    return list(manifest)
+
+
+def get_output_profile(name: str) -> OutputProfile:
+    if name not in OUTPUT_PROFILES:
+        raise ValueError(f"Unknown output profile: {name!r} (expected one of {tuple(OUTPUT_PROFILES)})")
+    return OUTPUT_PROFILES[name]
+
+
+def output_suffix(input_path: Path, profile: str = OUTPUT_PROFILE) -> str:
+    """File suffix of a processed image: the input's, unless the profile converts it."""
+    image_format = get_output_profile(profile).format
+    return FORMAT_SUFFIXES[image_format] if image_format else input_path.suffix
+
+
+def output_path_for(input_path: Path, input_folder: Path, output_folder: Path, ocr_results=None,
+                    suffix: Optional[str] = None) -> Path:
+    """
+    Build the output path of a processed image, mirroring its place under input_folder.
+
+    Args:
+        input_path (Path): Source image.
+        input_folder (Path): Root the relative output path is computed from.
+        output_folder (Path): Root of the processed images.
+        ocr_results (dict, optional): Dictionary mapping image stems to OCR results.
+        suffix (str, optional): Output suffix (see output_suffix); defaults to the input's.
+
+    Returns:
+        Path: Output path (its parent folder is created).
+    """
+    relative_path = input_path.relative_to(input_folder)
+    stem, suffix = relative_path.stem, suffix or relative_path.suffix
+
+    # Get OCR results for this image if available
+    ocr_text = ""
+    if ocr_results and stem in ocr_results:
+        x_vals = ocr_results[stem].get('X', [])
+        if len(x_vals) >= 2:  # Check if we have at least 2 X values
+            ocr_text = f"{x_vals[0]}_{x_vals[1]}_"
+
+    # Create new filename with OCR text
+    processed_name = f"{ocr_text}{stem}{suffix}"
+    processed_path = output_folder / relative_path.parent / processed_name
+    processed_path.parent.mkdir(parents=True, exist_ok=True)
+    return processed_path
+
+
+def save_processed_image(array: np.ndarray, processed_path: Path, profile: str = OUTPUT_PROFILE):
+    """
+    Encode a processed frame (decode_frame channel order: gray, BGR or BGRA) with PIL,
+    using the output profile's format and options (the format follows the path's suffix
+    when the profile keeps the input's).
+    """
+    output_profile = get_output_profile(profile)
+    if array.dtype == np.uint16:  # 16-bit scans are written as 8-bit, as they are OCR'd (see to_bgr)
+        array = cv2.convertScaleAbs(array, alpha=1 / 256)
+    if array.ndim == 3 and array.shape[2] == 4:
+        array = cv2.cvtColor(array, cv2.COLOR_BGRA2RGBA)
+    elif array.ndim == 3:
+        array = cv2.cvtColor(array, cv2.COLOR_BGR2RGB)
+    image = Image.fromarray(array)
+
+    image_format = output_profile.format or Image.registered_extensions().get(processed_path.suffix.lower())
+    if image_format == "JPEG" and image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    image.save(processed_path, format=image_format, **output_profile.options.get(image_format, {}))
+    print(f"🖼️ Saved: {processed_path}")
+
+
+def _process_one(input_path: Path, input_folder: Path, output_folder: Path, process_fn: Callable,
+                 ocr_results=None, jpeg_regions=None, output_profile: str = OUTPUT_PROFILE) -> Optional[str]:
+    """
+    Decode, process and save one image; returns its stem, or None if it can't be read.
+    With jpeg_regions, baseline JPEGs are redacted in the compressed domain instead.
+    """
+    processed_path = output_path_for(input_path, input_folder, output_folder, ocr_results,
+                                     suffix=output_suffix(input_path, output_profile))
+    if jpeg_regions is not None and redact_jpeg_file(input_path, processed_path, jpeg_regions):
+        return input_path.stem
+
+    frame = decode_frame(input_path)
+    if frame is None:
+        return None
+    save_processed_image(process_fn(frame), processed_path, output_profile)
+    return input_path.stem
+
+
+def map_bounded(fn: Callable, items: Iterable, workers: int, max_in_flight: int) -> Iterator:
+    """
+    Like ThreadPoolExecutor.map, in input order, but never more than max_in_flight
+    items are submitted ahead, so only that many decoded pages are held at once
+    and a generator manifest is consumed lazily.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def process_images(input_folder: Path, process_fn: Optional[Callable] = None, output_folder_name="output",
+                   ocr_results=None, files: Optional[Iterable[Path]] = None, workers: int = WRITER_WORKERS,
+                   max_in_flight: Optional[int] = None, output_profile: str = OUTPUT_PROFILE) -> list[str]:
     """
     Process images in a folder with the given function and save results.
 
     Args:
-        input_folder (Path): Directory to process.
-        process_fn (Callable): Image processing function.
+        input_folder (Path): Directory to process (and root of the output paths).
+        process_fn (Callable, optional): Image processing function. It gets a freshly
+            decoded frame nobody else holds, so it may modify it in place; defaults to
+            black_roi redacting in place (no full-page copy), with JPEGs redacted
+            losslessly in the compressed domain (see jpeg_redact).
         output_folder_name (str): Output folder name.
         ocr_results (dict, optional): Dictionary mapping image stems to OCR results.
+        files (Iterable[Path], optional): Manifest of the images to process (e.g. from
+            build_manifest), all under input_folder; walks input_folder when omitted.
+        workers (int): Threads pipelining decode -> process_fn -> encode; 1 runs serially.
+        max_in_flight (int, optional): Pages submitted ahead of the oldest unfinished one
+            (default 2 * workers).
+        output_profile (str): One of OUTPUT_PROFILES (encoding speed vs file size);
+            JPEGs are only redacted losslessly by profiles that keep the input's format.
 
     Returns:
         list[str]: List of original image stem names.
@@ -23,38 +197,22 @@ def process_images(input_folder: Path, process_fn: Callable, output_folder_name=
     output_folder = input_folder / output_folder_name
     output_folder.mkdir(parents=True, exist_ok=True)
 
-    original_stems = []
+    if files is None:
+        files = iter_image_files(input_folder, exclude=output_folder)
+    keeps_format = get_output_profile(output_profile).format is None
+    jpeg_regions = None
+    if process_fn is None:
+        process_fn = partial(black_roi, inplace=True)
+        jpeg_regions = (REDACT_REGION,) if JPEG_REDACT and keeps_format else None
 
-    for root, dirs, files in os.walk(input_folder):
-        root_path = Path(root)
-        if output_folder in root_path.parents or root_path == output_folder:
-            continue
+    process_one = partial(_process_one, input_folder=input_folder, output_folder=output_folder,
+                          process_fn=process_fn, ocr_results=ocr_results, jpeg_regions=jpeg_regions,
+                          output_profile=output_profile)
+    if workers <= 1:
+        stems = map(process_one, files)
+    else:
+        stems = map_bounded(process_one, files, workers, max_in_flight or 2 * workers)
 
-        for file in files:
-            if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.gif')):
-                input_path = root_path / file
-                relative_path = input_path.relative_to(input_folder)
-
-                stem, suffix = relative_path.stem, relative_path.suffix
-                
-                # Get OCR results for this image if available
-                ocr_text = ""
-                if ocr_results and stem in ocr_results:
-                    x_vals = ocr_results[stem].get('X', [])
-                    if len(x_vals) >= 2:  # Check if we have at least 2 X values
-                        ocr_text = f"{x_vals[0]}_{x_vals[1]}_"
-                
-                # Create new filename with OCR text
-                processed_name = f"{ocr_text}{stem}{suffix}"
-                processed_path = output_folder / relative_path.parent / processed_name
-                processed_path.parent.mkdir(parents=True, exist_ok=True)
-
-                with Image.open(input_path) as img:
-                    array = np.array(img)
-                    processed_array = process_fn(array)
-                    Image.fromarray(processed_array).save(processed_path)
-
-                print(f"🖼️ Saved: {processed_path}")
-                original_stems.append(stem)
-
-    return original_stems
\ No newline at end of file
+    # Stems come back in manifest order either way
+    original_stems = [stem for stem in stems if stem is not None]
+    return original_stems
@@ -0,0 +1,426 @@
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# --- Compressed-Domain Redaction ---
+# Baseline JPEGs are redacted without a decode / re-encode: the MCUs under the regions
+# are rewritten as flat black (DC only) and every other block keeps its coefficients,
+# so the file is bit-exact outside the MCU-aligned regions. Anything
+# else (progressive, arithmetic coding, 12-bit, several scans, CMYK, EXIF-rotated)
+# returns None and goes through the full path.
+JPEG_REDACT = os.environ.get("RFI_JPEG_REDACT", "1") == "1"
+JPEG_SUFFIXES = (".jpg", ".jpeg")
+
+SOF_HUFFMAN_SEQUENTIAL = (0xC0, 0xC1)
+SOF_OTHER = (0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF)
+DHT, DQT, DRI, SOS, EOI, APP1, APP14 = 0xC4, 0xDB, 0xDD, 0xDA, 0xD9, 0xE1, 0xEE
+EXIF_ORIENTATION = 0x0112
+EOB, ZRL = 0x00, 0xF0  # AC symbols: end of block, run of 16 zeros
+
+_SCAN_END = re.compile(rb"\xff[^\x00\xd0-\xd7]")  # first marker that isn't stuffing or a restart
+_RESTART = re.compile(rb"\xff[\xd0-\xd7]")
+
+
+class _Unsupported(Exception):
+    """The file can't be redacted in the compressed domain."""
+
+
+class HuffmanTable(NamedTuple):
+    lookup: list                        # next 16 bits -> (symbol, code length), None if invalid
+    codes: Dict[int, Tuple[int, int]]   # symbol -> (code, code length)
+
+
+class _Block(NamedTuple):
+    """One 8x8 block of an MCU: its scan component and tables."""
+    component: int
+    dc: HuffmanTable
+    ac: HuffmanTable
+    black_dc: int
+
+
+class JpegLayout(NamedTuple):
+    width: int
+    height: int
+    blocks: List[_Block]   # in MCU coding order
+    mcu_width: int
+    mcu_height: int
+    mcus_x: int
+    mcus_y: int
+    restart_interval: int
+    scan_start: int
+    scan_end: int
+
+
+# --- Header ---
+@lru_cache(maxsize=32)
+def _huffman_table(spec: bytes) -> HuffmanTable:
+    """Build a table from its DHT definition (16 code-length counts, then the symbols)."""
+    lookup = [None] * (1 << 16)
+    codes = {}
+    code, symbols = 0, iter(spec[16:])
+    for length in range(1, 17):
+        for _ in range(spec[length - 1]):
+            if code >= 1 << length:
+                raise _Unsupported("invalid Huffman table")
+            symbol = next(symbols)
+            codes[symbol] = (code, length)
+            span = 1 << (16 - length)
+            lookup[code * span:(code + 1) * span] = [(symbol, length)] * span
+            code += 1
+        code <<= 1
+    return HuffmanTable(lookup, codes)
+
+
+def _segments(data: bytes):
+    """Yield (marker, payload start, payload end) of the header segments, up to and including SOS."""
+    if data[:2] != b"\xff\xd8":
+        raise _Unsupported("not a JPEG")
+    pos = 2
+    while True:
+        while data[pos:pos + 2] == b"\xff\xff":  # fill bytes
+            pos += 1
+        if data[pos] != 0xFF:
+            raise _Unsupported("corrupt header")
+        marker = data[pos + 1]
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:  # markers without a payload
+            pos += 2
+            continue
+        end = pos + 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+        if end <= pos + 3 or end > len(data):
+            raise _Unsupported("truncated header")
+        yield marker, pos + 4, end
+        if marker == SOS:
+            return
+        pos = end
+
+
+def _exif_orientation(payload: bytes) -> int:
+    """Orientation tag of an APP1 Exif payload (1 when absent)."""
+    if payload[:6] != b"Exif\x00\x00":
+        return 1
+    tiff = payload[6:]
+    order = {b"II": "little", b"MM": "big"}.get(tiff[:2])
+    if order is None:
+        return 1
+    ifd = int.from_bytes(tiff[4:8], order)
+    for entry in range(ifd + 2, ifd + 2 + 12 * int.from_bytes(tiff[ifd:ifd + 2], order), 12):
+        if int.from_bytes(tiff[entry:entry + 2], order) == EXIF_ORIENTATION:
+            return int.from_bytes(tiff[entry + 8:entry + 10], order)
+    return 1
+
+
+def parse_layout(data: bytes) -> JpegLayout:
+    """Read what redaction needs from the headers of a single-scan baseline JPEG."""
+    quant, tables, frame, restart_interval, transform = {}, {}, None, 0, None
+    for marker, start, end in _segments(data):
+        payload = data[start:end]
+        if marker == DQT:
+            pos = 0
+            while pos < len(payload):
+                precision, table_id = payload[pos] >> 4, payload[pos] & 15
+                size = 2 if precision else 1
+                quant[table_id] = int.from_bytes(payload[pos + 1:pos + 1 + size], "big")  # DC quantizer
+                pos += 1 + 64 * size
+        elif marker == DHT:
+            pos = 0
+            while pos < len(payload):
+                count = sum(payload[pos + 1:pos + 17])
+                tables[payload[pos] >> 4, payload[pos] & 15] = _huffman_table(payload[pos + 1:pos + 17 + count])
+                pos += 17 + count
+        elif marker in SOF_HUFFMAN_SEQUENTIAL:
+            if payload[0] != 8:
+                raise _Unsupported(f"{payload[0]}-bit samples")
+            height, width = int.from_bytes(payload[1:3], "big"), int.from_bytes(payload[3:5], "big")
+            components = {payload[i]: (payload[i + 1] >> 4, payload[i + 1] & 15, payload[i + 2])
+                          for i in range(6, 6 + 3 * payload[5], 3)}
+            frame = (width, height, components, [payload[i] for i in range(6, 6 + 3 * payload[5], 3)])
+        elif marker in SOF_OTHER:
+            raise _Unsupported("not a baseline Huffman JPEG")
+        elif marker == DRI:
+            restart_interval = int.from_bytes(payload[:2], "big")
+        elif marker == APP1 and _exif_orientation(payload) not in (0, 1):
+            # Pages are redacted in decode_frame's upright coordinates, not the stored ones
+            raise _Unsupported("EXIF-rotated")
+        elif marker == APP14 and payload[:5] == b"Adobe" and len(payload) >= 12:
+            transform = payload[11]
+
+    if frame is None:
+        raise _Unsupported("no frame header")
+    width, height, components, order = frame
+    if not width or not height:
+        raise _Unsupported("height defined by DNL")
+    if len(components) not in (1, 3):
+        raise _Unsupported("not gray, YCbCr or RGB")
+
+    count = payload[0]
+    scan = [(payload[1 + 2 * i], payload[2 + 2 * i] >> 4, payload[2 + 2 * i] & 15) for i in range(count)]
+    if count != len(components) or tuple(payload[1 + 2 * count:4 + 2 * count]) != (0, 63, 0):
+        raise _Unsupported("not a single sequential scan")
+
+    # Black is level-shifted -128 -> DC -1024 on luma (every channel of an RGB JPEG); chroma stays neutral
+    rgb = len(components) == 3 and transform == 0
+    h_max = max(h for h, _, _ in components.values()) if count > 1 else 1
+    v_max = max(v for _, v, _ in components.values()) if count > 1 else 1
+    blocks = []
+    for scan_index, (component_id, dc_id, ac_id) in enumerate(scan):
+        if component_id not in components or (0, dc_id) not in tables or (1, ac_id) not in tables:
+            raise _Unsupported("scan references undefined components or tables")
+        h, v, table_id = components[component_id] if count > 1 else (1, 1, components[component_id][2])
+        if table_id not in quant:
+            raise _Unsupported("undefined quantization table")
+        black_dc = -1024 // quant[table_id] if rgb or component_id == order[0] else 0
+        blocks += [_Block(scan_index, tables[0, dc_id], tables[1, ac_id], black_dc)] * (h * v)
+        if EOB not in tables[1, ac_id].codes:
+            raise _Unsupported("AC table without an end-of-block code")
+
+    scan_start = end
+    match = _SCAN_END.search(data, scan_start)
+    if match is None or data[match.start():].lstrip(b"\xff")[:1] != bytes([EOI]):
+        raise _Unsupported("several scans or a truncated file")
+
+    mcu_width, mcu_height = 8 * h_max, 8 * v_max
+    return JpegLayout(width, height, blocks, mcu_width, mcu_height, -(-width // mcu_width), -(-height // mcu_height),
+                      restart_interval, scan_start, match.start())
+
+
+def target_mcus(layout: JpegLayout, regions: Sequence[Tuple[int, int, int, int]]) -> Set[int]:
+    """
+    Indices of the MCUs overlapping any (x, y, w, h) region. Whole MCUs are blackened:
+    with subsampled chroma, a luma block alone would leave the color of the chroma
+    block it shares with its neighbours.
+    """
+    targets = set()
+    for x, y, w, h in regions:
+        left, top = max(0, x), max(0, y)
+        right, bottom = min(layout.width, x + w), min(layout.height, y + h)
+        if left >= right or top >= bottom:
+            continue
+        for mcu_y in range(top // layout.mcu_height, (bottom - 1) // layout.mcu_height + 1):
+            targets.update(range(mcu_y * layout.mcus_x + left // layout.mcu_width,
+                                 mcu_y * layout.mcus_x + (right - 1) // layout.mcu_width + 1))
+    return targets
+
+
+# --- Entropy Coding ---
+class _BitReader:
+    """MSB-first reader over unstuffed entropy-coded data."""
+
+    def __init__(self, data: bytes):
+        self.data = data + b"\x00\x00\x00"  # room to peek past the end
+        self.end = 8 * len(data)
+        self.pos = 0
+
+    def bits(self, start: int, end: int) -> int:
+        first, last = start >> 3, (end + 7) >> 3
+        return (int.from_bytes(self.data[first:last], "big") >> (8 * last - end)) & ((1 << (end - start)) - 1)
+
+    def read(self, count: int) -> int:
+        value = self.bits(self.pos, self.pos + count) if count else 0
+        self.pos += count
+        return value
+
+    def decode(self, table: HuffmanTable) -> int:
+        entry = table.lookup[self.bits(self.pos, self.pos + 16)]
+        if entry is None:
+            raise _Unsupported("corrupt entropy-coded data")
+        self.pos += entry[1]
+        return entry[0]
+
+    def receive(self, size: int) -> int:
+        """Read a `size`-bit magnitude and sign-extend it (F.2.2.1 EXTEND)."""
+        value = self.read(size)
+        return value - (1 << size) + 1 if size and value < 1 << (size - 1) else value
+
+    def skip_ac(self, table: HuffmanTable):
+        k = 1
+        while k < 64:
+            run_size = self.decode(table)
+            run, size = run_size >> 4, run_size & 15
+            if size:
+                self.pos += size
+                k += run + 1
+            elif run == 15:
+                k += 16
+            else:
+                break
+
+
+def _dc_bits(diff: int, table: HuffmanTable) -> Tuple[int, int]:
+    """(bits, length) coding a DC difference."""
+    size = abs(diff).bit_length()
+    if size not in table.codes:
+        raise _Unsupported(f"DC table can't code a difference of {diff}")
+    code, length = table.codes[size]
+    return (code << size) | (diff if diff >= 0 else diff + (1 << size) - 1), length + size
+
+
+def _black_dc_bits(block: _Block, previous: int) -> Tuple[int, Tuple[int, int]]:
+    """
+    DC of a blackened block and its (bits, length): block.black_dc, or, when the table
+    (e.g. an optimized one) can't code that difference, the nearest darker DC it can
+    code, down to twice black (still clamped to 0 by decoders).
+    """
+    low, wanted = 2 * block.black_dc - 1 if block.black_dc else 0, block.black_dc - previous
+    best = None
+    for size in block.dc.codes:
+        if size == 0:
+            candidates = [0]
+        else:
+            candidates = [min(wanted, (1 << size) - 1), min(wanted, -(1 << (size - 1)))]
+        for diff in candidates:
+            if (abs(diff).bit_length() == size and diff <= wanted and previous + diff >= low
+                    and (best is None or diff > best)):
+                best = diff
+    if best is None:
+        raise _Unsupported("DC table can't code a black block")
+    return previous + best, _dc_bits(best, block.dc)
+
+
+def _align(pieces: list, slots: List[Tuple[int, HuffmanTable]], residue: int):
+    """
+    Fill the ZRL slots of the blackened blocks (0-3 runs of 16 zeros before their EOB,
+    which changes nothing) so that `residue` more bits are written, modulo 8. That keeps
+    the rest of the segment at its original bit offset, so it's copied byte for byte.
+    """
+    reachable = {0: ()}  # residue -> ZRL runs per slot so far (fewest runs first)
+    for _, table in slots:
+        step = table.codes[ZRL][1] if ZRL in table.codes else 0
+        grown = {}
+        for runs in range(4 if step else 1):
+            for total, choice in reachable.items():
+                grown.setdefault((total + runs * step) % 8, choice + (runs,))
+        reachable = grown
+    if residue not in reachable:
+        raise _Unsupported("can't keep the remaining data byte-aligned")
+
+    for (index, table), runs in zip(slots, reachable[residue]):
+        code, length = table.codes.get(ZRL, (0, 0))
+        value = 0
+        for _ in range(runs):
+            value = (value << length) | code
+        pieces[index] = (value, runs * length)
+
+
+def _rewrite_segment(segment: bytes, first_mcu: int, mcu_count: int, layout: JpegLayout,
+                     targets: Set[int], whole: bool = False) -> bytes:
+    """
+    Re-encode one entropy-coded segment (a restart interval, or the whole scan) with
+    its targeted MCUs blackened. Decoding stops one MCU past the last target, where
+    every DC predictor is back in sync, and the rest of the segment is copied as is
+    (unless `whole`, which re-encodes the segment to its end).
+    """
+    buf = segment.replace(b"\xff\x00", b"\xff")
+    reader = _BitReader(buf)
+    last_target = max(mcu for mcu in targets if first_mcu <= mcu < first_mcu + mcu_count)
+    stop = first_mcu + mcu_count if whole else min(first_mcu + mcu_count, last_target + 2)
+
+    components = max(block.component for block in layout.blocks) + 1
+    predictor, written = [0] * components, [0] * components
+    pieces, slots = [], []  # (bits, length) to write; slots are ZRL placeholders
+    for mcu in range(first_mcu, stop):
+        targeted = mcu in targets
+        for block in layout.blocks:
+            predictor[block.component] += reader.receive(reader.decode(block.dc))
+            ac_start = reader.pos
+            reader.skip_ac(block.ac)
+            if targeted:
+                dc, bits = _black_dc_bits(block, written[block.component])
+            else:
+                dc = predictor[block.component]
+                bits = _dc_bits(dc - written[block.component], block.dc)
+            pieces.append(bits)
+            written[block.component] = dc
+            if targeted:
+                slots.append((len(pieces), block.ac))
+                pieces.append((0, 0))
+                pieces.append(block.ac.codes[EOB])
+            else:
+                pieces.append((reader.bits(ac_start, reader.pos), reader.pos - ac_start))
+    if reader.pos > reader.end:
+        raise _Unsupported("truncated entropy-coded data")
+
+    tail = stop < first_mcu + mcu_count
+    if tail:
+        try:
+            _align(pieces, slots, (reader.pos - sum(length for _, length in pieces)) % 8)
+        except _Unsupported:
+            if not layout.restart_interval:
+                raise
+            # A restart interval is short: re-encode the rest of it instead
+            return _rewrite_segment(segment, first_mcu, mcu_count, layout, targets, whole=True)
+
+    out, value, length = bytearray(), 0, 0
+    for bits, count in pieces:
+        value, length = (value << count) | bits, length + count
+        if length >= 64:  # flush whole bytes so the pending value stays small
+            keep = length & 7
+            out += (value >> keep).to_bytes(length >> 3, "big")
+            value, length = value & ((1 << keep) - 1), keep
+    if tail:
+        # Complete the last partial byte with the original bits, then copy the rest verbatim
+        offset = reader.pos & 7
+        byte = reader.pos >> 3
+        if offset:
+            value, length = (value << (8 - offset)) | (buf[byte] & ((1 << (8 - offset)) - 1)), length + 8 - offset
+            byte += 1
+        rest = segment[byte + buf.count(b"\xff", 0, byte):]
+    else:
+        padding = -length % 8  # ones, as encoders pad
+        value, length, rest = (value << padding) | ((1 << padding) - 1), length + padding, b""
+    out += value.to_bytes(length // 8, "big")
+    return bytes(out).replace(b"\xff", b"\xff\x00") + rest
+
+
+def redact_jpeg(data: bytes, regions: Sequence[Tuple[int, int, int, int]]) -> Optional[bytes]:
+    """
+    Black out (x, y, w, h) regions of a baseline JPEG in the compressed domain.
+
+    The regions grow to the MCUs they touch (8x8 pixels, 16x16 with 4:2:0 chroma);
+    every other block, marker and metadata segment is kept bit for bit.
+
+    Returns:
+        Optional[bytes]: The redacted file, or None when it needs the decode / re-encode path.
+    """
+    try:
+        layout = parse_layout(data)
+        targets = target_mcus(layout, regions)
+        if not targets:
+            return data
+
+        scan = data[layout.scan_start:layout.scan_end]
+        total = layout.mcus_x * layout.mcus_y
+        interval = layout.restart_interval or total
+        markers = list(_RESTART.finditer(scan)) if layout.restart_interval else []
+        if len(markers) != -(-total // interval) - 1:
+            raise _Unsupported("restart markers don't match the restart interval")
+
+        bounds = [0] + [m.start() for m in markers] + [len(scan)]
+        starts = [0] + [m.end() for m in markers]
+        touched = {mcu // interval for mcu in targets}
+        out = [data[:layout.scan_start]]
+        for k, start in enumerate(starts):
+            segment = scan[start:bounds[k + 1]]
+            if k in touched:
+                segment = _rewrite_segment(segment, k * interval, min(interval, total - k * interval), layout, targets)
+            out.append(segment)
+            if k < len(markers):
+                out.append(markers[k].group())
+        out.append(data[layout.scan_end:])
+        return b"".join(out)
+    except (_Unsupported, IndexError, StopIteration):
+        return None
+
+
+def redact_jpeg_file(input_path: Path, output_path: Path,
+                     regions: Sequence[Tuple[int, int, int, int]]) -> bool:
+    """Write the compressed-domain redaction of a JPEG; False (nothing written) if it needs the full path."""
+    if not JPEG_REDACT or input_path.suffix.lower() not in JPEG_SUFFIXES:
+        return False
+    redacted = redact_jpeg(input_path.read_bytes(), regions)
+    if redacted is None:
+        return False
+    output_path.write_bytes(redacted)
+    print(f"🖼️ Saved (lossless JPEG redaction): {output_path}")
+    return True
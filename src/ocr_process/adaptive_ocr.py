@@ -0,0 +1,107 @@
+import os
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+from pytesseract import Output
+
+from ocr_process.image_processor import process_roi
+from ocr_process.ocr_profiles import DIGIT_WHITELIST, OCRProfile
+
+
+# --- Escalation Tiers ---
+# Tier 0: whole ROI, sparse text, LSTM-only (fast model when available), digit whitelist
+# Tier 1: one line, single-line psm, 2x upscaled crop, default model
+# Tier 2: same as tier 1 on the ROI re-thresholded with Otsu
+LOW_CONFIDENCE = float(os.environ.get("RFI_ADAPTIVE_MIN_CONFIDENCE", 80))
+UPSCALE = 2
+LINE_PADDING = 4
+
+TIER0_CONFIG = OCRProfile("adaptive_tier0", psm=11, oem=1, whitelist=DIGIT_WHITELIST, model="fast").config()
+ESCALATION_CONFIG = OCRProfile("adaptive_escalation", psm=7).config()
+
+
+def _read_lines(image: np.ndarray, config: str) -> List[dict]:
+    """
+    Run image_to_data and group words into lines.
+
+    Returns:
+        List[dict]: One entry per line with its text, minimum word confidence,
+        (left, top, right, bottom) box and paragraph key, in reading order.
+    """
+    data = pytesseract.image_to_data(image, config=config, output_type=Output.DICT)
+    lines = []
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        box = (data["left"][i], data["top"][i],
+               data["left"][i] + data["width"][i], data["top"][i] + data["height"][i])
+        confidence = float(data["conf"][i])
+
+        if lines and lines[-1]["key"] == key:
+            line = lines[-1]
+            line["text"] += " " + word
+            line["confidence"] = min(line["confidence"], confidence)
+            line["box"] = (min(line["box"][0], box[0]), min(line["box"][1], box[1]),
+                           max(line["box"][2], box[2]), max(line["box"][3], box[3]))
+        else:
+            lines.append({"key": key, "text": word, "confidence": confidence, "box": box})
+    return lines
+
+
+def _read_line_crop(thresholded: np.ndarray, box) -> Tuple[str, float]:
+    """Read one line box from a thresholded ROI as a single upscaled text line."""
+    left, top, right, bottom = box
+    height, width = thresholded.shape[:2]
+    crop = thresholded[max(0, top - LINE_PADDING):min(height, bottom + LINE_PADDING),
+                       max(0, left - LINE_PADDING):min(width, right + LINE_PADDING)]
+    crop = cv2.resize(crop, None, fx=UPSCALE, fy=UPSCALE, interpolation=cv2.INTER_CUBIC)
+    words = _read_lines(crop, ESCALATION_CONFIG)
+    if not words:
+        return "", -1.0
+    return " ".join(line["text"] for line in words), min(line["confidence"] for line in words)
+
+
+def read_roi_adaptive(roi: np.ndarray, min_confidence: float = LOW_CONFIDENCE) -> Tuple[str, List[int]]:
+    """
+    OCR a raw (BGR) ROI with a cheap pass and escalate only low-confidence lines.
+
+    Args:
+        roi (np.ndarray): ROI cropped from the page, before process_roi.
+        min_confidence (float): Lines whose weakest word is below this are escalated.
+
+    Returns:
+        Tuple[str, List[int]]: The text (lines joined like Tesseract's text output)
+        and the tier that produced each line.
+    """
+    thresholded = process_roi(roi)
+    lines = _read_lines(thresholded, TIER0_CONFIG)
+    tiers = []
+    otsu = None
+
+    for line in lines:
+        tier = 0
+        if line["confidence"] < min_confidence:
+            candidates = [(line["confidence"], line["text"], 0)]
+            text, confidence = _read_line_crop(thresholded, line["box"])
+            candidates.append((confidence, text, 1))
+
+            if confidence < min_confidence:
+                if otsu is None:
+                    otsu = process_roi(roi, thresh=None)
+                text, confidence = _read_line_crop(otsu, line["box"])
+                candidates.append((confidence, text, 2))
+
+            confidence, text, tier = max((c for c in candidates if c[1]), default=candidates[0])
+            line["text"] = text
+        tiers.append(tier)
+
+    pieces = []
+    for i, line in enumerate(lines):
+        if i:
+            pieces.append("\n\n" if lines[i - 1]["key"][:2] != line["key"][:2] else "\n")
+        pieces.append(line["text"])
+    return "".join(pieces).strip(), tiers
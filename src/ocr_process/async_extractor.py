@@ -0,0 +1,75 @@
+import asyncio
+import contextlib
+import os
+import shlex
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+
+from ocr_process.text_extractor import TESSERACT_CONFIG
+
+
+# Tesseract processes allowed in flight at once by extract_many_async
+MAX_CONCURRENCY = int(os.environ.get("RFI_OCR_ASYNC_CONCURRENCY", os.cpu_count() or 1))
+
+
+def _encode_roi(roi: np.ndarray) -> bytes:
+    """Encode a ROI in memory; light compression keeps the encode cheaper than the pipe."""
+    ok, buffer = cv2.imencode(".png", roi, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    if not ok:
+        raise ValueError("Could not encode ROI for Tesseract.")
+    return buffer.tobytes()
+
+
+async def _extract_process_async(roi: np.ndarray, semaphore: Optional[asyncio.Semaphore] = None,
+                                 config: str = TESSERACT_CONFIG) -> str:
+    """Run one tesseract process, streaming the ROI over stdin and reading the text from stdout."""
+    payload = _encode_roi(roi)
+    command = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", *shlex.split(config)]
+    # One process per ROI is already the unit of parallelism
+    env = {**os.environ, "OMP_THREAD_LIMIT": os.environ.get("OMP_THREAD_LIMIT", "1")}
+
+    async with semaphore or contextlib.nullcontext():
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        stdout, stderr = await process.communicate(payload)
+
+    if process.returncode != 0:
+        raise pytesseract.TesseractError(process.returncode, stderr.decode("utf-8", errors="replace").strip())
+    return stdout.decode("utf-8").strip()
+
+
+async def extract_from_image_async(processed_x: np.ndarray, processed_y: np.ndarray,
+                                   semaphore: Optional[asyncio.Semaphore] = None) -> Tuple[str, str]:
+    """Async counterpart of extract_from_image; both ROIs are recognized concurrently."""
+    extracted_x, extracted_y = await asyncio.gather(
+        _extract_process_async(processed_x, semaphore),
+        _extract_process_async(processed_y, semaphore),
+    )
+    return extracted_x, extracted_y
+
+
+async def extract_many_async(pairs: Iterable[Tuple[np.ndarray, np.ndarray]],
+                             max_concurrency: int = MAX_CONCURRENCY) -> List[Tuple[str, str]]:
+    """
+    Recognize many (processed_x, processed_y) pairs with bounded concurrency.
+
+    Args:
+        pairs (Iterable[Tuple[np.ndarray, np.ndarray]]): Processed ROIs per image.
+        max_concurrency (int): Maximum tesseract processes running at once.
+
+    Returns:
+        List[Tuple[str, str]]: (text_x, text_y) per image, in input order.
+    """
+    semaphore = asyncio.BoundedSemaphore(max(1, max_concurrency))
+    return await asyncio.gather(*(
+        extract_from_image_async(processed_x, processed_y, semaphore)
+        for processed_x, processed_y in pairs
+    ))
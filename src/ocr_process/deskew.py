@@ -0,0 +1,155 @@
+import os
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_process.sheet_templates import MAX_DISTANCE, SheetTemplate, header_signature
+
+
+# --- Deskew Settings ---
+# Angles are estimated on a small Otsu-binarized copy of the page, without Tesseract OSD
+DESKEW = os.environ.get("RFI_DESKEW", "1") == "1"
+ANALYSIS_SIDE = 256     # longest side of the analysis copy (orientation and coarse skew)
+FINE_SIDE = 768         # longest side of the fine skew copy (1 px across it is ~0.1 deg)
+MAX_SKEW = 5.0          # degrees searched either way
+COARSE_STEP = 1.0
+FINE_STEP = 0.1
+SCORE_TIE = 0.002       # relative score difference below which angles tie
+MIN_SKEW = 0.5          # smaller skews are left alone (1 px across ANALYSIS_SIDE is ~0.22 deg)
+SIDEWAYS_RATIO = 2.0    # turned/upright text-line strength above which a page is sideways
+FLIP_RATIO = 1.5        # bottom/top ink above which an upright page is flipped (no signatures)
+
+# Counter-clockwise quarter turns
+QUARTER_TURNS = {90: cv2.ROTATE_90_COUNTERCLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_CLOCKWISE}
+
+
+def rotate_quarter(page: np.ndarray, orientation: int) -> np.ndarray:
+    return cv2.rotate(page, QUARTER_TURNS[orientation]) if orientation else page
+
+
+def _analysis_copy(page: np.ndarray, side: int = ANALYSIS_SIDE) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Gray copy downscaled to `side`, its ink mask (text = 255) and the downscale factor."""
+    factor = max(1.0, max(page.shape[:2]) / side)
+    small = cv2.resize(page, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(np.ascontiguousarray(small[..., :3]), cv2.COLOR_BGR2GRAY)
+    _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return small, ink, factor
+
+
+def _line_score(ink: np.ndarray, angle: float) -> float:
+    """Variance of the row profile after rotating by `angle`: highest when text lines are level."""
+    if angle:
+        height, width = ink.shape
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        ink = cv2.warpAffine(ink, matrix, (width, height), flags=cv2.INTER_NEAREST, borderValue=0)
+    return float(np.var(ink.sum(axis=1, dtype=np.float32)))
+
+
+def _best_angle(ink: np.ndarray, angles: np.ndarray) -> float:
+    """
+    Centre of the run of best-scoring angles: rotations below the analysis
+    resolution leave the mask unchanged, so a level page scores a tied plateau.
+    """
+    scores = np.array([_line_score(ink, angle) for angle in angles])
+    top = scores >= scores.max() * (1 - SCORE_TIE)
+    low = high = int(np.argmax(scores))
+    while low > 0 and top[low - 1]:
+        low -= 1
+    while high + 1 < len(angles) and top[high + 1]:
+        high += 1
+    return float(angles[low] + angles[high]) / 2
+
+
+def estimate_skew(ink: np.ndarray, fine_ink: Optional[np.ndarray] = None) -> float:
+    """
+    Counter-clockwise rotation (degrees) that levels the text lines: coarse search
+    on `ink`, then fine search on `fine_ink`, a larger mask of the same page (at
+    ANALYSIS_SIDE a rotation of a few tenths of a degree moves no text pixel).
+    """
+    best = _best_angle(ink, np.arange(-MAX_SKEW, MAX_SKEW + COARSE_STEP / 2, COARSE_STEP))
+    fine = np.arange(best - COARSE_STEP, best + COARSE_STEP + FINE_STEP / 2, FINE_STEP)
+    fine_ink = ink if fine_ink is None else fine_ink
+    skew = _best_angle(fine_ink, fine)
+    # Pages with few text lines can peak off level without scoring better than level
+    if _line_score(fine_ink, 0) >= _line_score(fine_ink, skew) * (1 - SCORE_TIE):
+        return 0.0
+    return round(skew, 2) + 0.0  # no -0.0
+
+
+def _line_strength(ink: np.ndarray) -> float:
+    """
+    Row-profile variance at the best coarse skew, divided by the squared mean:
+    scale-free, so a page can be compared with its quarter turn, and a skewed
+    page still scores its text lines.
+    """
+    mean = float(ink.sum(axis=1, dtype=np.float32).mean())
+    if not mean:
+        return 0.0
+    angles = np.arange(-MAX_SKEW, MAX_SKEW + COARSE_STEP / 2, COARSE_STEP)
+    return max(_line_score(ink, angle) for angle in angles) / mean ** 2
+
+
+def estimate_orientation(small: np.ndarray, ink: np.ndarray, factor: float,
+                         templates: Dict[str, SheetTemplate]) -> int:
+    """
+    Counter-clockwise quarter turn (0, 90, 180 or 270) that puts the page upright.
+
+    When templates have header signatures, all four turns are hashed and the
+    nearest signature wins; ties go to the turns whose text lines run level,
+    then to the smallest turn. Pages matching no signature (or registries
+    without any) are only turned sideways when their text lines are
+    SIDEWAYS_RATIO times stronger across than along the page, towards the
+    top-heavy side (forms are top-heavy); an upright page is flipped only when
+    its bottom half holds FLIP_RATIO times the ink of its top half.
+    """
+    level = _line_strength(ink)
+    across = _line_strength(rotate_quarter(ink, 90))
+
+    signatures = [template.signature for template in templates.values() if template.signature is not None]
+    if signatures:
+        def rank(orientation):
+            signature = header_signature(rotate_quarter(small, orientation), factor)
+            distance = min(bin(signature ^ reference).count("1") for reference in signatures)
+            lines_level = level >= across if orientation in (0, 180) else across >= level
+            return distance, not lines_level, orientation
+        best = min((0, 90, 180, 270), key=rank)
+        if rank(best)[0] <= MAX_DISTANCE:
+            return best
+
+    def top_ink(orientation):
+        turned = rotate_quarter(ink, orientation)
+        return int(turned[:turned.shape[0] // 2].sum(dtype=np.int64))
+
+    if across > SIDEWAYS_RATIO * level:
+        return max((90, 270), key=top_ink)
+    return 180 if top_ink(180) > FLIP_RATIO * top_ink(0) else 0
+
+
+def estimate_rotation(page: np.ndarray, templates: Dict[str, SheetTemplate]) -> Tuple[int, float]:
+    """
+    Estimate the correction a page needs.
+
+    Returns:
+        Tuple[int, float]: The quarter turn and the residual skew, both counter-clockwise degrees.
+    """
+    small, ink, factor = _analysis_copy(page)
+    orientation = estimate_orientation(small, ink, factor, templates)
+    _, fine_ink, _ = _analysis_copy(page, FINE_SIDE)
+    return orientation, estimate_skew(rotate_quarter(ink, orientation), rotate_quarter(fine_ink, orientation))
+
+
+def needs_correction(orientation: int, skew: float) -> bool:
+    return bool(orientation) or abs(skew) >= MIN_SKEW
+
+
+def correct_page(page: np.ndarray, orientation: int, skew: float) -> np.ndarray:
+    """Apply a quarter turn and, when above MIN_SKEW, the skew rotation (edges replicate the paper)."""
+    page = rotate_quarter(page, orientation)
+    if abs(skew) >= MIN_SKEW:
+        height, width = page.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), skew, 1.0)
+        page = cv2.warpAffine(page, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_REPLICATE)
+    return page
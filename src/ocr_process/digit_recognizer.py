@@ -0,0 +1,168 @@
+import os
+from collections import defaultdict
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_process.image_processor import text_line_spans
+from ocr_process.text_extractor import _extract_process
+
+
+# --- Recognizer Settings ---
+GLYPH_SIZE = 20  # glyphs are scaled to the line height and centred on a square canvas
+GLYPH_BANK_PATH = os.environ.get("RFI_GLYPH_BANK", "")
+CONFIDENCE_THRESHOLD = float(os.environ.get("RFI_GLYPH_CONFIDENCE", 0.85))
+SPACE_RATIO = 0.6      # gap wider than this fraction of the line height is a space
+FALLBACK_PADDING = 8   # background added around a line before handing it to Tesseract
+
+
+# --- Segmentation ---
+def segment_glyphs(line: np.ndarray) -> List[Tuple[int, int]]:
+    """Return (left, right) column spans of glyphs; components overlapping in x are merged (e.g. '=')."""
+    count, _, stats, _ = cv2.connectedComponentsWithStats((line > 0).astype(np.uint8), connectivity=8)
+    spans = sorted((stats[i, cv2.CC_STAT_LEFT], stats[i, cv2.CC_STAT_LEFT] + stats[i, cv2.CC_STAT_WIDTH])
+                   for i in range(1, count))
+    merged = []
+    for left, right in spans:
+        if merged and left < merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], right)
+        else:
+            merged.append([left, right])
+    return [(int(left), int(right)) for left, right in merged]
+
+
+def glyph_vector(line: np.ndarray, left: int, right: int) -> np.ndarray:
+    """Scale a glyph (full line height, so baseline position is kept) into a zero-mean unit vector."""
+    glyph = (line[:, left:right] > 0).astype(np.float32)
+    height, width = glyph.shape
+    scaled_w = max(1, min(GLYPH_SIZE, round(width * GLYPH_SIZE / height)))
+    scaled = cv2.resize(glyph, (scaled_w, GLYPH_SIZE), interpolation=cv2.INTER_AREA)
+
+    canvas = np.zeros((GLYPH_SIZE, GLYPH_SIZE), dtype=np.float32)
+    offset = (GLYPH_SIZE - scaled_w) // 2
+    canvas[:, offset:offset + scaled_w] = scaled
+
+    vector = canvas.ravel() - canvas.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# --- Glyph Bank ---
+class GlyphBank:
+    """Averaged glyph templates and their characters."""
+
+    def __init__(self, templates: np.ndarray, labels: List[str]):
+        self.templates = templates
+        self.labels = labels
+
+    def classify(self, vectors: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """Return the nearest character and its cosine similarity for each glyph vector."""
+        similarity = vectors @ self.templates.T
+        best = similarity.argmax(axis=1)
+        return [self.labels[i] for i in best], similarity[np.arange(len(best)), best]
+
+    def save(self, path: str):
+        np.savez_compressed(path, templates=self.templates, labels=np.array(self.labels))
+
+    @classmethod
+    def load(cls, path: str) -> "GlyphBank":
+        data = np.load(path)
+        return cls(data["templates"], [str(label) for label in data["labels"]])
+
+
+def build_glyph_bank(samples: Iterable[Tuple[np.ndarray, str]]) -> GlyphBank:
+    """
+    Build a glyph bank from thresholded ROIs and their known text.
+
+    Lines (and glyphs within a line) are only used when the segmentation
+    agrees with the text, so a few bad samples don't pollute the templates.
+
+    Args:
+        samples (Iterable[Tuple[np.ndarray, str]]): (thresholded ROI, text) pairs.
+
+    Returns:
+        GlyphBank: One averaged template per character seen.
+    """
+    vectors = defaultdict(list)
+    for roi, text in samples:
+        text_lines = [line.replace(" ", "") for line in text.splitlines() if line.strip()]
+        spans = text_line_spans(roi)
+        if len(spans) != len(text_lines):
+            continue
+        for (top, bottom), chars in zip(spans, text_lines):
+            line = roi[top:bottom]
+            glyphs = segment_glyphs(line)
+            if len(glyphs) != len(chars):
+                continue
+            for (left, right), char in zip(glyphs, chars):
+                vectors[char].append(glyph_vector(line, left, right))
+
+    if not vectors:
+        raise ValueError("No usable glyphs: segmentation never matched the sample text.")
+
+    labels = sorted(vectors)
+    templates = np.stack([np.mean(vectors[char], axis=0) for char in labels])
+    templates /= np.linalg.norm(templates, axis=1, keepdims=True)
+    return GlyphBank(templates.astype(np.float32), labels)
+
+
+_bank = None
+
+
+def get_bank() -> GlyphBank:
+    """Load the glyph bank configured by RFI_GLYPH_BANK once per process."""
+    global _bank
+    if _bank is None:
+        if not GLYPH_BANK_PATH or not os.path.exists(GLYPH_BANK_PATH):
+            raise RuntimeError("No glyph bank found: build one with 'benchmark.py glyph-bank' "
+                               "and point RFI_GLYPH_BANK at it.")
+        _bank = GlyphBank.load(GLYPH_BANK_PATH)
+    return _bank
+
+
+# --- Recognition ---
+def read_line(line: np.ndarray, bank: GlyphBank) -> Tuple[str, float]:
+    """Classify the glyphs of one line; the line confidence is its weakest glyph's similarity."""
+    glyphs = segment_glyphs(line)
+    if not glyphs:
+        return "", 0.0
+
+    chars, scores = bank.classify(np.stack([glyph_vector(line, left, right) for left, right in glyphs]))
+    text = chars[0]
+    for (prev_left, prev_right), (left, _), char in zip(glyphs, glyphs[1:], chars[1:]):
+        if left - prev_right > SPACE_RATIO * line.shape[0]:
+            text += " "
+        text += char
+    return text, float(scores.min())
+
+
+def recognize(roi: np.ndarray, bank: Optional[GlyphBank] = None,
+              threshold: float = CONFIDENCE_THRESHOLD) -> Tuple[str, List[float], int]:
+    """
+    Read a thresholded ROI line by line with the glyph bank, using Tesseract only for weak lines.
+
+    Args:
+        roi (np.ndarray): Thresholded ROI from process_roi.
+        bank (GlyphBank, optional): Templates; defaults to get_bank().
+        threshold (float): Minimum line confidence accepted without Tesseract.
+
+    Returns:
+        Tuple[str, List[float], int]: The text (one line per text line), the
+        confidence of each line and the number of lines sent to Tesseract.
+    """
+    bank = bank or get_bank()
+    lines, confidences, fallbacks = [], [], 0
+
+    for top, bottom in text_line_spans(roi):
+        line = roi[top:bottom]
+        text, confidence = read_line(line, bank)
+        if confidence < threshold:
+            padded = cv2.copyMakeBorder(line, FALLBACK_PADDING, FALLBACK_PADDING,
+                                        FALLBACK_PADDING, FALLBACK_PADDING, cv2.BORDER_CONSTANT, value=0)
+            text = _extract_process(padded)
+            fallbacks += 1
+        lines.append(text)
+        confidences.append(confidence)
+
+    return "\n".join(lines), confidences, fallbacks
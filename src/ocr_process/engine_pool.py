@@ -0,0 +1,124 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import tesserocr
+except ImportError:  # libtesseract bindings are optional; fall back to pytesseract
+    tesserocr = None
+
+
+# --- Pool Defaults ---
+DEFAULT_LANG = "eng"
+DEFAULT_PSM = 11  # sparse text, same as "--psm 11"
+DEFAULT_OEM = 3   # default engine, same as "--oem 3"
+
+
+def is_available() -> bool:
+    """Return True when the in-process libtesseract bindings can be used."""
+    return tesserocr is not None
+
+
+def _default_pool_size() -> int:
+    return int(os.environ.get("RFI_OCR_POOL_SIZE", os.cpu_count() or 1))
+
+
+class EnginePool:
+    """
+    A fixed-size pool of initialized libtesseract engines.
+
+    Each engine loads its traineddata once and is then reused for every ROI,
+    so no process is spawned and no temp file is written per recognition.
+    Engines are not thread-safe, so each one is checked out by a single
+    worker at a time.
+    """
+
+    def __init__(self, size: Optional[int] = None, lang: str = DEFAULT_LANG,
+                 psm: int = DEFAULT_PSM, oem: int = DEFAULT_OEM,
+                 variables: Optional[dict] = None, path: Optional[str] = None):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed; the engine pool is unavailable.")
+
+        self.size = max(1, size or _default_pool_size())
+        self._engines = queue.Queue()
+        self._all_engines = []
+        self._executor = None
+
+        for _ in range(self.size):
+            kwargs = {"lang": lang, "psm": psm, "oem": oem}
+            if path:
+                kwargs["path"] = path
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            for name, value in (variables or {}).items():
+                api.SetVariable(name, str(value))
+            self._engines.put(api)
+            self._all_engines.append(api)
+
+    @contextmanager
+    def engine(self):
+        """Check out one engine for the duration of the block."""
+        api = self._engines.get()
+        try:
+            yield api
+        finally:
+            self._engines.put(api)
+
+    def recognize(self, image: np.ndarray) -> str:
+        """Recognize a single uint8 image (grayscale or BGR) and return its text."""
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+
+        with self.engine() as api:
+            api.SetImageBytes(image.tobytes(), width, height,
+                              bytes_per_pixel, width * bytes_per_pixel)
+            text = api.GetUTF8Text()
+            api.Clear()
+        return text.strip()
+
+    def recognize_many(self, images: Iterable[np.ndarray]) -> List[str]:
+        """Recognize a batch of images across all engines, preserving order."""
+        images = list(images)
+        if self.size == 1 or len(images) <= 1:
+            return [self.recognize(image) for image in images]
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size)
+        return list(self._executor.map(self.recognize, images))
+
+    def close(self):
+        """Release every engine and the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for api in self._all_engines:
+            api.End()
+        self._all_engines.clear()
+
+
+# --- Process-wide Pools ---
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(psm: int = DEFAULT_PSM, oem: int = DEFAULT_OEM, variables: Optional[dict] = None,
+             path: Optional[str] = None) -> EnginePool:
+    """Return the process-wide pool for these engine settings, creating it on first use."""
+    key = (psm, oem, tuple(sorted((variables or {}).items())), path)
+    with _pool_lock:
+        if key not in _pools:
+            _pools[key] = EnginePool(psm=psm, oem=oem, variables=variables, path=path)
+    return _pools[key]
+
+
+def shutdown_pool():
+    """Close every shared pool (they are rebuilt on the next get_pool call)."""
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
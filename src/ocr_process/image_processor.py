@@ -1,11 +1,72 @@
+import io
+import os
+from pathlib import Path
+
 import cv2
 import numpy as np
-from typing import Tuple
+from PIL import Image
+from typing import List, Optional, Tuple
+
 
+# Extensions every stage (upload, manifest, redaction, benchmarks) treats as images
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.gif')
 
 # --- ROI Definitions ---
 ROI_X_COORDS = (223, 402, 107, 172)  # (x, y, w, h)
 ROI_Y_COORDS = (337, 402, 117, 175)
+ROI_Y_HEADER_LINES = 2  # table header lines above the Ref Y values (dropped by clean_text)
+
+# OCR profile (see ocr_profiles.PROFILES) used to read each ROI
+ROI_PROFILES = {
+    "X": os.environ.get("RFI_OCR_PROFILE_X", "default"),
+    "Y": os.environ.get("RFI_OCR_PROFILE_Y", "default"),
+}
+
+# --- Blank ROI Gate ---
+# A thresholded ROI needs this much foreground and this many ink blobs to be worth OCR
+BLANK_MIN_FOREGROUND_RATIO = float(os.environ.get("RFI_BLANK_MIN_FOREGROUND_RATIO", 0.003))
+BLANK_MIN_COMPONENTS = int(os.environ.get("RFI_BLANK_MIN_COMPONENTS", 1))
+BLANK_MIN_COMPONENT_AREA = int(os.environ.get("RFI_BLANK_MIN_COMPONENT_AREA", 4))  # smaller blobs are specks
+
+# --- Tight Crop ---
+# Thresholded ROIs are cut down to their text (minus the Y header) before OCR
+TIGHT_CROP = os.environ.get("RFI_TIGHT_CROP", "1") == "1"
+TIGHT_CROP_MARGIN = 6  # background kept around the text; Tesseract misreads glyphs touching the edge
+TEXT_LINE_MIN_HEIGHT = 3  # shorter row spans are specks or rules, not text lines
+# The three pixel sizes above are for full-resolution pages: reduced decodes divide them by the factor
+
+THUMBNAIL_SIZE = 256  # longest side of gallery previews
+
+# --- Decode Modes ---
+# How OCR-only runs decode pages: (imread flag, downscale factor). Gray modes skip the
+# BGR->gray conversion and hold a third of the memory; reduced modes let libjpeg
+# downscale while decoding, and ROI coordinates are divided by the factor.
+DECODE_MODES = {
+    "color": (cv2.IMREAD_COLOR, 1),
+    "gray": (cv2.IMREAD_GRAYSCALE, 1),
+    "gray_reduced2": (cv2.IMREAD_REDUCED_GRAYSCALE_2, 2),
+    "gray_reduced4": (cv2.IMREAD_REDUCED_GRAYSCALE_4, 4),
+    "gray_reduced8": (cv2.IMREAD_REDUCED_GRAYSCALE_8, 8),
+}
+DECODE_MODE = os.environ.get("RFI_DECODE_MODE", "color")
+
+# --- Partial Decoding ---
+# Rows decoded past the last ROI row, so chroma upsampling of ROI rows sees real neighbours
+PARTIAL_DECODE_MARGIN = 16
+JPEG_SEQUENTIAL_SOF = (0xC0, 0xC1)           # baseline / extended sequential Huffman
+TIFF_IMAGE_WIDTH, TIFF_IMAGE_LENGTH, TIFF_PLANAR_CONFIG = 256, 257, 284
+EXIF_ORIENTATION = 0x0112
+
+# EXIF orientation -> the transform cv2.imread applies to upright the page
+EXIF_TRANSFORMS = {
+    2: lambda page: cv2.flip(page, 1),
+    3: lambda page: cv2.rotate(page, cv2.ROTATE_180),
+    4: lambda page: cv2.flip(page, 0),
+    5: cv2.transpose,
+    6: lambda page: cv2.rotate(page, cv2.ROTATE_90_CLOCKWISE),
+    7: lambda page: cv2.flip(cv2.transpose(page), -1),
+    8: lambda page: cv2.rotate(page, cv2.ROTATE_90_COUNTERCLOCKWISE),
+}
 
 
 # --- Image Loading ---
@@ -14,6 +75,215 @@ def load_image(image_path: str) -> np.ndarray:
     return cv2.imread(image_path)
 
 
+def exif_orientation(img: Image.Image) -> int:
+    """
+    EXIF orientation of an opened image (1 when absent), read from its header only:
+    PNG eXIf chunks after the pixel data are ignored rather than loading the image.
+    """
+    if img.format == "PNG":
+        if "exif" not in img.info:
+            return 1
+        exif = Image.Exif()
+        exif.load(img.info["exif"])
+        return exif.get(EXIF_ORIENTATION, 1)
+    if img.format in ("JPEG", "MPO", "TIFF", "WEBP"):
+        return img.getexif().get(EXIF_ORIENTATION, 1)
+    return 1
+
+
+def decode_frame(image_path) -> Optional[np.ndarray]:
+    """
+    Decode a page once, keeping its own channels and depth (gray, BGR or BGRA), so
+    that redaction, ROI extraction and thumbnails can all share the same array.
+    EXIF orientation is applied as cv2.imread(path) does, so ROIs land where they
+    do in CSV-only runs. Formats OpenCV can't read are decoded with PIL. Returns
+    None if unreadable.
+    """
+    frame = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)  # ignores EXIF orientation
+    if frame is None:
+        try:
+            with Image.open(image_path) as img:
+                frame = cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+        except OSError:
+            return None
+        return frame
+
+    try:
+        with Image.open(image_path) as img:
+            orientation = exif_orientation(img)
+    except (OSError, ValueError, SyntaxError):
+        orientation = 1
+    if orientation in EXIF_TRANSFORMS:
+        frame = EXIF_TRANSFORMS[orientation](frame)
+    return frame
+
+
+def get_decode_mode(mode: str) -> Tuple[int, int]:
+    """Return the (imread flag, downscale factor) of a decode mode."""
+    if mode not in DECODE_MODES:
+        raise ValueError(f"Unknown decode mode: {mode!r} (expected one of {tuple(DECODE_MODES)})")
+    return DECODE_MODES[mode]
+
+
+def is_gray_mode(mode: str) -> bool:
+    return mode.startswith("gray")
+
+
+def scale_coords(coords: Tuple[int, int, int, int], factor: int) -> Tuple[int, int, int, int]:
+    """Map (x, y, w, h) on the full page onto a page downscaled by `factor` (sizes rounded up)."""
+    x, y, w, h = coords
+    return x // factor, y // factor, -(-w // factor), -(-h // factor)
+
+
+def _pil_to_mode(img: Image.Image, mode: str) -> np.ndarray:
+    """Convert a PIL image the way cv2.imread would decode it in the given mode."""
+    _, factor = get_decode_mode(mode)
+    if is_gray_mode(mode):
+        img = img.convert("L")
+        return np.asarray(img.reduce(factor) if factor > 1 else img)
+    return cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+
+def decode_page(image_path, mode: str = DECODE_MODE) -> Optional[np.ndarray]:
+    """Decode a whole page in a decode mode (see DECODE_MODES). Returns None if unreadable."""
+    flag, _ = get_decode_mode(mode)
+    page = cv2.imread(str(image_path), flag)
+    if page is None:
+        try:
+            with Image.open(image_path) as img:
+                page = _pil_to_mode(img, mode)
+        except OSError:
+            return None
+    return page
+
+
+def _decode_jpeg_rows(image_path, rows: int, mode: str) -> Optional[np.ndarray]:
+    """
+    Decode the first `rows` rows of a sequential JPEG by lowering the SOF height:
+    libjpeg then stops after the MCU rows covering them and skips the rest.
+
+    PIL decodes it (pixel-identical to cv2.imdecode, reduced modes included) since
+    its libjpeg error handler drops the "extraneous bytes before marker" warning
+    cv2 would print on stderr for every page.
+    """
+    data = bytearray(Path(image_path).read_bytes())
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0xDA or 0xC2 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return None  # scan before SOF, or a progressive / lossless / arithmetic frame
+        if marker in JPEG_SEQUENTIAL_SOF:
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            if rows >= height:
+                return None
+            data[i + 5:i + 7] = rows.to_bytes(2, "big")
+            _, factor = get_decode_mode(mode)
+            with Image.open(io.BytesIO(data)) as img:
+                if not is_gray_mode(mode):
+                    return cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+                # libjpeg's DCT scaling, as the IMREAD_REDUCED_GRAYSCALE_* flags use
+                size = tuple(-(-side // factor) for side in img.size)
+                img.draft("L", (max(1, img.size[0] // factor), max(1, img.size[1] // factor)))
+                return np.array(img.convert("L")) if img.size == size else None
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def _decode_tiff_rows(image_path, rows: int, mode: str) -> Optional[np.ndarray]:
+    """
+    Decode the first `rows` rows of a strip or tiled TIFF by lowering ImageLength in
+    its first IFD: libtiff then only reads the strips / tile rows covering them.
+    Reduced modes are resized with the full page's ratio, exactly as cv2.imread does.
+    """
+    data = bytearray(Path(image_path).read_bytes())
+    order = {b"II": "little", b"MM": "big"}.get(bytes(data[:2]))
+    if order is None or int.from_bytes(data[2:4], order) != 42:
+        return None  # not a classic TIFF (e.g. BigTIFF)
+    ifd = int.from_bytes(data[4:8], order)
+    width = height = length_field = None
+    for entry in range(ifd + 2, ifd + 2 + 12 * int.from_bytes(data[ifd:ifd + 2], order), 12):
+        tag = int.from_bytes(data[entry:entry + 2], order)
+        size = 2 if int.from_bytes(data[entry + 2:entry + 4], order) == 3 else 4  # SHORT or LONG
+        value = int.from_bytes(data[entry + 8:entry + 8 + size], order)
+        if tag == TIFF_IMAGE_WIDTH:
+            width = value
+        elif tag == TIFF_IMAGE_LENGTH:
+            height, length_field = value, slice(entry + 8, entry + 8 + size)
+        elif tag == TIFF_PLANAR_CONFIG and value != 1:
+            return None  # planes stored one after the other: strip indices depend on the height
+    if not width or height is None or rows >= height:
+        return None
+    data[length_field] = rows.to_bytes(length_field.stop - length_field.start, order)
+
+    flag, factor = get_decode_mode(mode)
+    if factor == 1:
+        return cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    page = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if page is None:
+        return None
+    return cv2.resize(page, None, fx=(width // factor) / width, fy=(height // factor) / height,
+                      interpolation=cv2.INTER_LINEAR_EXACT)
+
+
+def decode_roi_rows(image_path, coords_list=(ROI_X_COORDS, ROI_Y_COORDS),
+                    mode: str = "color") -> Tuple[Optional[np.ndarray], bool]:
+    """
+    Decode only the top of a page, down to the last row any ROI needs.
+
+    Sequential JPEG pages stop decoding after those MCU rows and strip or tiled
+    TIFF pages after those strips / tile rows; other formats, progressive files
+    and EXIF-rotated pages fall back to a full decode.
+    ROI coordinates stay valid because the page origin is kept (divide them
+    by the mode's factor with scale_coords).
+
+    Returns:
+        Tuple[Optional[np.ndarray], bool]: The page in the decode mode (None if
+        unreadable) and whether fewer rows than the full page were decoded.
+    """
+    rows = max(y + h for _, y, _, h in coords_list) + PARTIAL_DECODE_MARGIN
+    image, height = None, 0
+    try:
+        with Image.open(image_path) as img:
+            # Only the header is read here: the format is checked before any EXIF lookup
+            decode_rows = {"JPEG": _decode_jpeg_rows, "TIFF": _decode_tiff_rows}.get(img.format)
+            if decode_rows is not None and exif_orientation(img) == 1:
+                height = img.size[1]
+                image = decode_rows(image_path, rows, mode)
+    except (OSError, ValueError, SyntaxError):
+        image = None
+
+    _, factor = get_decode_mode(mode)
+    if image is not None and image.shape[0] < -(-height // factor):
+        return image, True
+    return decode_page(image_path, mode), False
+
+
+def to_bgr(frame: np.ndarray) -> np.ndarray:
+    """Return an 8-bit BGR version of a decoded frame, as cv2.imread(path) would load it."""
+    if frame.dtype == np.uint16:
+        frame = cv2.convertScaleAbs(frame, alpha=1 / 256)
+    if frame.ndim == 2:
+        return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+    return frame
+
+
+def encode_thumbnail(frame: np.ndarray, max_side: int = THUMBNAIL_SIZE) -> bytes:
+    """Downscale a decoded frame and JPEG-encode it for the preview gallery."""
+    image = to_bgr(frame)
+    scale = max_side / max(image.shape[:2])
+    if scale < 1:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return buffer.tobytes() if ok else b""
+
+
 # --- ROI Extraction ---
 def extract_roi(image: np.ndarray, coords: Tuple[int, int, int, int]) -> np.ndarray:
     """Extract a single ROI given coordinates."""
@@ -22,11 +292,148 @@ def extract_roi(image: np.ndarray, coords: Tuple[int, int, int, int]) -> np.ndar
 
 
 # --- Image Preprocessing ---
-def process_roi(roi: np.ndarray) -> np.ndarray:
-    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-    _, thresholded_roi = cv2.threshold(gray, 30, 225, cv2.THRESH_BINARY_INV)
+def process_roi(roi: np.ndarray, thresh: Optional[int] = 30) -> np.ndarray:
+    """Grayscale (unless already gray) and inverse-binarize a ROI; thresh=None picks the threshold with Otsu."""
+    gray = roi if roi.ndim == 2 else cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    if thresh is None:
+        _, thresholded_roi = cv2.threshold(gray, 0, 225, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    else:
+        _, thresholded_roi = cv2.threshold(gray, thresh, 225, cv2.THRESH_BINARY_INV)
     return thresholded_roi
 
+def crop_roi_stack(pages, coords: Tuple[int, int, int, int], out: Optional[np.ndarray] = None,
+                   gray: bool = False) -> np.ndarray:
+    """
+    Crop the same ROI from every page into an (N, h, w, 3) uint8 BGR stack,
+    or an (N, h, w) stack of gray pages when gray is True.
+
+    Gray pages are broadcast to three channels and alpha is dropped. Pixels a
+    page doesn't cover stay white, i.e. background once thresholded. `out` is
+    reused when its shape matches.
+    """
+    x, y, w, h = coords
+    shape = (len(pages), h, w) if gray else (len(pages), h, w, 3)
+    if out is None or out.shape != shape or out.dtype != np.uint8:
+        out = np.empty(shape, dtype=np.uint8)
+    out.fill(255)
+    for i, page in enumerate(pages):
+        roi = page[y:y + h, x:x + w]
+        if not gray and roi.ndim == 2:
+            roi = roi[..., None]
+        out[i, :roi.shape[0], :roi.shape[1]] = roi if gray else roi[..., :3]
+    return out
+
+
+def threshold_roi_stack(crops: np.ndarray, thresh: int = 30, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Grayscale and inverse-binarize an (N, h, w, 3) BGR stack (or threshold an
+    (N, h, w) gray stack) in one cv2 pass.
+
+    The stack is viewed as a single (N * h, w) image, so each pixel goes through
+    the same cvtColor / threshold as in process_roi and the result is identical.
+
+    Returns:
+        np.ndarray: (N, h, w) uint8 stack of 0 / 225 pixels (`out` when its shape matches).
+    """
+    n, h, w = crops.shape[:3]
+    if out is None or out.shape != (n, h, w) or out.dtype != np.uint8 or not out.flags.c_contiguous:
+        out = np.empty((n, h, w), dtype=np.uint8)
+    sheet = np.ascontiguousarray(crops).reshape((n * h, w) + crops.shape[3:])
+    if sheet.ndim == 3:
+        sheet = cv2.cvtColor(sheet, cv2.COLOR_BGR2GRAY)
+    cv2.threshold(sheet, thresh, 225, cv2.THRESH_BINARY_INV, dst=out.reshape(n * h, w))
+    return out
+
+
+def process_roi_batch(pages, coords: Tuple[int, int, int, int], thresh: int = 30,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Batch version of extract_roi + process_roi over many pages.
+
+    Args:
+        pages: Decoded pages (BGR, BGRA or gray).
+        coords (Tuple[int, int, int, int]): (x, y, w, h) of the ROI.
+        thresh (int): Gray level above which a pixel is background.
+        out (np.ndarray, optional): (N, h, w) uint8 buffer to reuse.
+
+    Returns:
+        np.ndarray: (N, h, w) stack of thresholded ROIs.
+    """
+    return threshold_roi_stack(crop_roi_stack(pages, coords), thresh=thresh, out=out)
+
+
+def text_line_spans(thresholded_roi: np.ndarray,
+                    min_height: int = TEXT_LINE_MIN_HEIGHT) -> List[Tuple[int, int]]:
+    """Return (top, bottom) row spans of text lines using the horizontal projection."""
+    rows = np.flatnonzero((thresholded_roi > 0).any(axis=1))
+    if rows.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) > 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+    return [(int(top), int(bottom)) for top, bottom in zip(starts, ends) if bottom - top >= min_height]
+
+
+def tight_crop(thresholded_roi: np.ndarray, header_lines: int = 0,
+               margin: int = TIGHT_CROP_MARGIN, factor: int = 1) -> Tuple[np.ndarray, int]:
+    """
+    Crop a thresholded ROI to the bounding box of its text lines, using the
+    row and column projections, after dropping its first `header_lines` lines.
+
+    Specks shorter than a text line don't widen the box. The header is only
+    dropped when there is at least one line below it. `factor` is the ROI's
+    decode downscale, which the margin and line height are divided by.
+
+    Returns:
+        Tuple[np.ndarray, int]: The crop (a view) and how many header lines were dropped.
+    """
+    spans = text_line_spans(thresholded_roi, min_height=-(-TEXT_LINE_MIN_HEIGHT // factor))
+    if not spans:
+        return thresholded_roi, 0
+    margin = -(-margin // factor)
+    dropped = header_lines if len(spans) > header_lines else 0
+    height, width = thresholded_roi.shape[:2]
+
+    # Keep the top margin clear of the last dropped header line
+    floor = spans[dropped - 1][1] if dropped else 0
+    top, bottom = max(floor, spans[dropped][0] - margin), min(height, spans[-1][1] + margin)
+    columns = np.flatnonzero(thresholded_roi[spans[dropped][0]:spans[-1][1]].any(axis=0))
+    left, right = max(0, columns[0] - margin), min(width, columns[-1] + 1 + margin)
+    return thresholded_roi[top:bottom, left:right], dropped
+
+
+def _similar_heights(spans: List[Tuple[int, int]], ratio: float = 2.0) -> bool:
+    """True when no span is `ratio` times taller than another (no merged text lines)."""
+    heights = [bottom - top for top, bottom in spans]
+    return max(heights) <= ratio * min(heights)
+
+
+def is_blank_roi(thresholded_roi: np.ndarray, header_lines: int = 0,
+                 min_foreground_ratio: float = BLANK_MIN_FOREGROUND_RATIO,
+                 min_components: int = BLANK_MIN_COMPONENTS,
+                 min_component_area: int = BLANK_MIN_COMPONENT_AREA, factor: int = 1) -> bool:
+    """
+    Return True when a thresholded ROI has too little ink to contain any values.
+
+    The first `header_lines` text lines (e.g. the ROI_Y table header) are not counted.
+    When the projection can't isolate them (lines merged by touching glyphs or a
+    table rule through the ROI), the whole ROI is tested instead. `factor` is the
+    ROI's decode downscale: line heights shrink by it and component areas by its square.
+    """
+    if header_lines:
+        spans = text_line_spans(thresholded_roi, min_height=-(-TEXT_LINE_MIN_HEIGHT // factor))
+        if len(spans) > header_lines:
+            thresholded_roi = thresholded_roi[spans[header_lines][0]:]
+        elif len(spans) == header_lines and _similar_heights(spans):
+            return True  # only the header
+
+    foreground = thresholded_roi > 0
+    if foreground.mean() < min_foreground_ratio:
+        return True
+    count, _, stats, _ = cv2.connectedComponentsWithStats(foreground.astype(np.uint8), connectivity=8)
+    components = int((stats[1:, cv2.CC_STAT_AREA] >= -(-min_component_area // factor ** 2)).sum())
+    return components < min_components
+
 # --- ROI Processing Wrappers (Independent) ---
 def process_roi_x(image: np.ndarray) -> np.ndarray:
     """Extract and process the X-ROI."""
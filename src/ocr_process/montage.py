@@ -0,0 +1,134 @@
+import numpy as np
+import pytesseract
+from pytesseract import Output
+from typing import List, Sequence, Tuple
+
+from ocr_process.ocr_cache import cached_recognize
+from ocr_process.ocr_profiles import PROFILES, OCRProfile
+from ocr_process.text_extractor import TESSERACT_CONFIG
+
+
+# --- Montage Defaults ---
+DEFAULT_TILES = 16   # ROIs recognized per Tesseract call
+GUTTER = 48          # background pixels between tiles (and around the canvas)
+COLUMNS = 1          # a single column keeps words of neighbouring tiles off the same text line
+
+
+# --- Canvas Layout ---
+def build_montage(rois: Sequence[np.ndarray], columns: int = COLUMNS, gutter: int = GUTTER,
+                  background: int = 0) -> Tuple[np.ndarray, List[Tuple[int, int, int, int]]]:
+    """
+    Tile thresholded ROIs onto one canvas separated by background gutters.
+
+    Args:
+        rois (Sequence[np.ndarray]): Thresholded single-channel ROIs.
+        columns (int): Number of tile columns.
+        gutter (int): Gap in pixels between tiles.
+        background (int): Gutter value; thresholded ROIs are inverted (text on 0).
+
+    Returns:
+        Tuple[np.ndarray, List[Tuple[int, int, int, int]]]: The canvas and the
+        (x, y, w, h) box of every tile, in input order.
+    """
+    cell_w = max(roi.shape[1] for roi in rois)
+    cell_h = max(roi.shape[0] for roi in rois)
+    rows = -(-len(rois) // columns)
+
+    width = gutter + columns * (cell_w + gutter)
+    height = gutter + rows * (cell_h + gutter)
+    canvas = np.full((height, width), background, dtype=np.uint8)
+
+    boxes = []
+    for i, roi in enumerate(rois):
+        row, col = divmod(i, columns)
+        x = gutter + col * (cell_w + gutter)
+        y = gutter + row * (cell_h + gutter)
+        h, w = roi.shape[:2]
+        canvas[y:y+h, x:x+w] = roi
+        boxes.append((x, y, w, h))
+
+    return canvas, boxes
+
+
+# --- Word Mapping ---
+def _tile_index(boxes, cx, cy):
+    for i, (x, y, w, h) in enumerate(boxes):
+        if x <= cx < x + w and y <= cy < y + h:
+            return i
+    return None
+
+
+def split_words_by_tile(data: dict, boxes: Sequence[Tuple[int, int, int, int]]) -> List[str]:
+    """
+    Rebuild the per-tile text from an image_to_data result.
+
+    Words are assigned to the tile containing their box centre and joined the
+    way Tesseract's plain-text renderer does: words on a line by a space,
+    lines by a newline, paragraphs by a blank line.
+    """
+    pieces = [[] for _ in boxes]
+    last_keys = [None] * len(boxes)
+
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        cx = data["left"][i] + data["width"][i] // 2
+        cy = data["top"][i] + data["height"][i] // 2
+        tile = _tile_index(boxes, cx, cy)
+        if tile is None:
+            continue
+
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        last = last_keys[tile]
+        if last is not None:
+            if last[:2] != key[:2]:
+                pieces[tile].append("\n\n")
+            elif last != key:
+                pieces[tile].append("\n")
+            else:
+                pieces[tile].append(" ")
+        pieces[tile].append(word)
+        last_keys[tile] = key
+
+    return ["".join(parts).strip() for parts in pieces]
+
+
+# --- Recognition ---
+def recognize_montage(rois: Sequence[np.ndarray], config: str = TESSERACT_CONFIG,
+                      background: int = 0) -> List[str]:
+    """Recognize several ROIs with a single Tesseract call."""
+    canvas, boxes = build_montage(rois, background=background)
+    data = pytesseract.image_to_data(canvas, config=config, output_type=Output.DICT)
+    return split_words_by_tile(data, boxes)
+
+
+def extract_rois_montage(rois: Sequence[np.ndarray], tiles: int = DEFAULT_TILES,
+                         profile: OCRProfile = PROFILES["default"]) -> List[str]:
+    """Recognize a flat list of prepared ROIs, `tiles` per canvas; returns one text per ROI."""
+    config = profile.config()
+    background = 255 if profile.negate else 0
+
+    def recognize_tiled(rois):
+        texts = []
+        for start in range(0, len(rois), max(1, tiles)):
+            texts += recognize_montage(rois[start:start + tiles], config, background)
+        return texts
+
+    # Cached separately from per-ROI results; only uncached ROIs are tiled
+    return cached_recognize(list(rois), recognize_tiled, config + " montage")
+
+
+def extract_many_montage(pairs, tiles: int = DEFAULT_TILES):
+    """
+    Montage variant of text_extractor.extract_many.
+
+    Args:
+        pairs (Iterable[Tuple[np.ndarray, np.ndarray]]): (processed_x, processed_y) per image.
+        tiles (int): Maximum number of ROIs per canvas.
+
+    Returns:
+        list[Tuple[str, str]]: (text_x, text_y) per image, in input order.
+    """
+    texts = extract_rois_montage([roi for pair in pairs for roi in pair], tiles)
+    return list(zip(texts[0::2], texts[1::2]))
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+# --- Cache Settings ---
+CACHE_ENABLED = os.environ.get("RFI_OCR_CACHE", "1") != "0"
+CACHE_PATH = Path(os.environ.get(
+    "RFI_OCR_CACHE_PATH", Path.home() / ".cache" / "rfi-text-extractor" / "ocr_cache.sqlite"))
+MEMORY_ENTRIES = int(os.environ.get("RFI_OCR_CACHE_MEMORY_ENTRIES", 4096))
+DISK_BYTES = int(os.environ.get("RFI_OCR_CACHE_DISK_MB", 256)) * 1024 * 1024
+EVICT_EVERY = 64  # disk size is checked every N writes
+
+
+def cache_key(roi: np.ndarray, config: str) -> str:
+    """Content address of a thresholded ROI recognized with the given OCR config."""
+    digest = hashlib.sha256()
+    digest.update(config.encode("utf-8"))
+    digest.update(f"{roi.shape}{roi.dtype}".encode("ascii"))
+    digest.update(np.ascontiguousarray(roi).data)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Two-tier OCR result cache: an in-memory LRU in front of a size-bounded SQLite file.
+
+    Every entry stores the seconds Tesseract spent producing it, so hits can
+    be reported as saved OCR time.
+    """
+
+    def __init__(self, path: Path = CACHE_PATH, memory_entries: int = MEMORY_ENTRIES,
+                 disk_bytes: int = DISK_BYTES):
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = Counter()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL, seconds REAL NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ocr_cache_last_used ON ocr_cache (last_used)")
+        self._db.commit()
+
+    # --- Lookups ---
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["cache_memory_hits"] += 1
+                self._stats["cache_saved_seconds"] += entry[1]
+                return entry[0]
+
+            row = self._db.execute("SELECT text, seconds FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["cache_misses"] += 1
+                return None
+
+            self._db.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self._remember(key, row[0], row[1])
+            self._stats["cache_disk_hits"] += 1
+            self._stats["cache_saved_seconds"] += row[1]
+            return row[0]
+
+    def put(self, key: str, text: str, seconds: float):
+        with self._lock:
+            self._remember(key, text, seconds)
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, text, seconds, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, text, seconds, len(key) + len(text.encode("utf-8")), time.time()),
+            )
+            self._db.commit()
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict_disk()
+
+    # --- Eviction ---
+    def _remember(self, key, text, seconds):
+        self._memory[key] = (text, seconds)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        excess = total - self.disk_bytes
+        if excess <= 0:
+            return
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM ocr_cache ORDER BY last_used"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany("DELETE FROM ocr_cache WHERE key = ?", stale)
+        self._db.commit()
+
+    # --- Counters ---
+    def stats(self) -> Counter:
+        """Hit/miss counters and the Tesseract seconds saved by hits."""
+        with self._lock:
+            return Counter(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# --- Process-wide Cache ---
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+_bypass_depth = 0  # > 0 inside cache_disabled()
+
+
+@contextmanager
+def cache_disabled():
+    """Bypass the cache in this process, e.g. so benchmarks time Tesseract rather than cache hits."""
+    global _bypass_depth
+    _bypass_depth += 1
+    try:
+        yield
+    finally:
+        _bypass_depth -= 1
+
+
+def get_cache() -> Optional[OCRCache]:
+    """Return the process-wide cache, or None when RFI_OCR_CACHE=0 or inside cache_disabled()."""
+    global _cache, _cache_pid
+    if not CACHE_ENABLED or _bypass_depth:
+        return None
+    with _cache_lock:
+        # A forked worker must not share the parent's SQLite connection
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = OCRCache()
+            _cache_pid = os.getpid()
+    return _cache
+
+
+def cache_stats() -> Counter:
+    """Counters of the process-wide cache (empty when caching is disabled)."""
+    cache = get_cache()
+    return cache.stats() if cache is not None else Counter()
+
+
+def cached_recognize(rois: Sequence[np.ndarray], recognize_many: Callable, config: str) -> List[str]:
+    """
+    Recognize ROIs through the cache; only the misses are passed to recognize_many.
+
+    Args:
+        rois (Sequence[np.ndarray]): Thresholded ROIs.
+        recognize_many (Callable): Uncached batch recognizer returning one text per ROI.
+        config (str): OCR config the texts depend on (part of the cache key).
+
+    Returns:
+        List[str]: One text per ROI, in input order.
+    """
+    cache = get_cache()
+    if cache is None:
+        return list(recognize_many(rois))
+
+    keys = [cache_key(roi, config) for roi in rois]
+    texts = [cache.get(key) for key in keys]
+    missing = [i for i, text in enumerate(texts) if text is None]
+    if missing:
+        start = time.perf_counter()
+        fresh = recognize_many([rois[i] for i in missing])
+        seconds = (time.perf_counter() - start) / len(missing)
+        for i, text in zip(missing, fresh):
+            texts[i] = text
+            cache.put(keys[i], text, seconds)
+    return texts
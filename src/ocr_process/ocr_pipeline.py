@@ -0,0 +1,363 @@
+import time
+from collections import Counter
+from functools import partial
+from pathlib import Path
+from typing import Collection, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from black_roi.blackening_roi import black_roi, redaction_mask
+from black_roi.folder_importer import (
+    OUTPUT_PROFILE, WRITER_WORKERS, get_output_profile, map_bounded, output_path_for, output_suffix,
+    save_processed_image
+)
+from black_roi.jpeg_redact import redact_jpeg_file
+from ocr_process import adaptive_ocr, deskew, digit_recognizer, montage, row_reader
+from ocr_process.image_processor import (
+    DECODE_MODE, TIGHT_CROP, crop_roi_stack, decode_frame, decode_page, decode_roi_rows, encode_thumbnail,
+    extract_roi, get_decode_mode, is_blank_roi, is_gray_mode, scale_coords, threshold_roi_stack, tight_crop, to_bgr
+)
+from ocr_process.ocr_cache import cache_stats
+from ocr_process.ocr_profiles import get_profile, prepare_roi
+from ocr_process.parallel_runner import DEFAULT_CHUNK_SIZE, map_chunks
+from ocr_process.quality_check import QUALITY_CHECK, assess_rois
+from ocr_process.registration import register_page, registration_windows
+from ocr_process.sheet_templates import classify_page, get_templates, template_windows
+from ocr_process.text_cleaner import clean_text
+from ocr_process.text_extractor import extract_rois
+
+
+# --- OCR Modes ---
+# "per_roi": one recognition per ROI (engine pool or pytesseract)
+# "montage": many ROIs tiled onto one canvas per Tesseract call
+# "templates": glyph-bank digit reader, Tesseract only for low-confidence lines
+# "adaptive": cheap whitelisted pass, low-confidence lines escalated to costlier tiers
+# "rows": ROIs split into text lines, every line of the chunk read with --psm 7 in one batch
+OCR_MODES = ("per_roi", "montage", "templates", "adaptive", "rows")
+
+
+def _stack_crops(roi_crops: List[np.ndarray], gray: bool) -> np.ndarray:
+    """Stack ROI crops of one kind, padding smaller ones (other templates, page edges) with background."""
+    height = max((crop.shape[0] for crop in roi_crops), default=0)
+    width = max((crop.shape[1] for crop in roi_crops), default=0)
+    return crop_roi_stack(roi_crops, (0, 0, width, height), gray=gray)
+
+
+def _recognize_rois(ocr_mode: str, raw_rois: List[np.ndarray], rois: List[np.ndarray],
+                    profile_names: List[str], montage_tiles: int, stats: Counter,
+                    header_cropped: List[int]) -> Tuple[List[str], List[list], List[int]]:
+    """
+    Recognize thresholded ROIs with the given mode.
+
+    profile_names holds the OCR profile of each ROI (used by "per_roi", "montage"
+    and "rows") and header_cropped the header lines already removed from it (see tight_crop).
+
+    Returns:
+        Tuple[List[str], List[list], List[int]]: Text, line tiers and header lines
+        cropped before OCR, per ROI.
+    """
+    tiers = [[] for _ in rois]
+    cropped = list(header_cropped)
+
+    if ocr_mode in ("per_roi", "montage", "rows"):
+        # ROIs are batched per OCR profile (one per ROI kind and sheet template)
+        texts = [""] * len(rois)
+        for profile_name in dict.fromkeys(profile_names):
+            profile = get_profile(profile_name)
+            indices = [i for i, name in enumerate(profile_names) if name == profile_name]
+            if ocr_mode == "rows":
+                batch_texts, batch_cropped = row_reader.extract_rois_by_rows(
+                    [rois[i] for i in indices], profile, [cropped[i] for i in indices])
+                for i, text, header_lines in zip(indices, batch_texts, batch_cropped):
+                    texts[i], cropped[i] = text, header_lines
+                continue
+            prepared = []
+            for i in indices:
+                roi, cropped[i] = prepare_roi(rois[i], profile, cropped[i])
+                prepared.append(roi)
+            if ocr_mode == "montage":
+                batch_texts = montage.extract_rois_montage(prepared, tiles=montage_tiles, profile=profile)
+            else:
+                batch_texts = extract_rois(prepared, profile)
+            for i, text in zip(indices, batch_texts):
+                texts[i] = text
+    elif ocr_mode == "templates":
+        texts = []
+        for roi in rois:
+            text, confidences, fallbacks = digit_recognizer.recognize(roi)
+            stats["template_lines"] += len(confidences) - fallbacks
+            stats["template_fallback_lines"] += fallbacks
+            texts.append(text)
+    elif ocr_mode == "adaptive":
+        # Escalation tiers re-threshold the raw ROI
+        texts = []
+        for i, roi in enumerate(raw_rois):
+            text, tiers[i] = adaptive_ocr.read_roi_adaptive(roi)
+            for tier in tiers[i]:
+                stats[f"tier{tier}_lines"] += 1
+            texts.append(text)
+
+    return texts, tiers, cropped
+
+
+class _PageWrite(NamedTuple):
+    """A decoded page waiting to be redacted and saved by _write_page."""
+    image_path: Path
+    frame: np.ndarray
+    output_path: Path
+    angle: float
+    redact_windows: tuple
+    redact_polygons: tuple
+
+
+def _write_page(page: _PageWrite, output_profile: str, keeps_format: bool) -> Tuple[bool, str]:
+    """
+    Redact a page in place and save it; returns whether it was re-encoded (rather
+    than rewritten losslessly) and its JPEG thumbnail. Safe to run on writer threads.
+    """
+    # A template without regions gets no mask: its empty regions, not black_roi's default, apply
+    redacted = black_roi(page.frame, regions=page.redact_windows, inplace=True,
+                         mask=redaction_mask(page.redact_windows, page.redact_polygons))
+    # Unrotated JPEGs with box-only redaction are rewritten losslessly instead of re-encoded
+    reencoded = bool(page.angle or page.redact_polygons or not keeps_format
+                     or not redact_jpeg_file(page.image_path, page.output_path, page.redact_windows))
+    if reencoded:
+        save_processed_image(redacted, page.output_path, output_profile)
+    return reencoded, encode_thumbnail(redacted)
+
+
+def ocr_image_files(image_files: Iterable[Path], ocr_mode: str = "per_roi",
+                    montage_tiles: int = montage.DEFAULT_TILES, skip_blank: bool = True,
+                    profiles: Optional[dict] = None, input_folder: Optional[Path] = None,
+                    output_folder: Optional[Path] = None, decode_mode: str = DECODE_MODE,
+                    output_profile: str = OUTPUT_PROFILE,
+                    redact_only: Collection[Path] = ()) -> Tuple[List[Tuple[str, dict]], Counter]:
+    """
+    Run decode -> template classification -> ROI processing -> OCR -> cleaning
+    over a group of images.
+
+    Every page is assigned a sheet template (see sheet_templates.classify_page),
+    which gives its ROIs, redaction regions and OCR profiles.
+
+    Each page is decoded once. When output_folder is given, the same frame is
+    also redacted with black_roi, saved (mirroring its path under input_folder;
+    unrotated baseline JPEGs are redacted losslessly, see jpeg_redact) and turned
+    into a JPEG thumbnail stored under the result's "thumbnail" key; with
+    RFI_WRITER_WORKERS > 1 that happens on threads while the next pages decode.
+    Without output_folder only the rows down to the last ROI are decoded when the
+    format allows it (see image_processor.decode_roi_rows), in `decode_mode`.
+
+    Args:
+        image_files (Iterable[Path]): Images to read.
+        ocr_mode (str): One of OCR_MODES.
+        montage_tiles (int): ROIs per canvas when ocr_mode is "montage".
+        skip_blank (bool): Don't OCR ROIs that is_blank_roi considers empty.
+        profiles (dict, optional): OCR profile name per ROI kind ("X", "Y") for the
+            "per_roi", "montage" and "rows" modes, overriding the templates' profiles.
+        input_folder (Path, optional): Root of the inputs, for output paths.
+        output_folder (Path, optional): Where redacted pages are written.
+        decode_mode (str): One of image_processor.DECODE_MODES, for runs without
+            output_folder (redacted pages always need the full color frame).
+        output_profile (str): Encoding of the redacted pages (see folder_importer.OUTPUT_PROFILES).
+        redact_only (Collection[Path]): Images that are redacted and saved but not OCR'd
+            (e.g. pages vh_classifier can't pair); they get no result.
+
+    Returns:
+        Tuple[List[Tuple[str, dict]], Counter]: (image stem, {"X": [...], "Y": [...]}) for
+        every readable image, and the run counters of this group (images, cache hits...).
+        The per-image dict also holds the "sheet_template" name, the rotation
+        applied by deskew ("angle", counter-clockwise degrees) and, for flagged or
+        rejected (not OCR'd) pages, the "quality" report; modes may add keys
+        (e.g. "tiers" for "adaptive").
+    """
+    if ocr_mode not in OCR_MODES:
+        raise ValueError(f"Unknown OCR mode: {ocr_mode!r} (expected one of {OCR_MODES})")
+
+    templates = get_templates()
+    windows = template_windows(templates) + registration_windows(templates)
+    cache_before = cache_stats()
+    stats = Counter()
+
+    keeps_format = get_output_profile(output_profile).format is None
+    if output_folder is not None:
+        decode_mode = "color"
+    _, factor = get_decode_mode(decode_mode)
+    gray = is_gray_mode(decode_mode)
+
+    stems, angles, page_templates, qualities, thumbnails = [], [], [], [], []
+    skipped = set()  # indices of redact_only pages
+    crops = {"X": [], "Y": []}
+
+    def decoded_pages():
+        """Decode and analyse every page, yielding the ones to redact and save."""
+        for image_path in image_files:
+            if output_folder is None:
+                frame = None
+                img, partial_decode = decode_roi_rows(image_path, windows, mode=decode_mode)
+                stats["partial_decodes"] += partial_decode
+            else:
+                frame = decode_frame(image_path)
+                img = to_bgr(frame) if frame is not None else None
+            if img is None:
+                stats["unreadable_images"] += 1
+                continue
+
+            # Straighten sideways / skewed scans (a partial decode is redone in full first)
+            angle = 0.0
+            if deskew.DESKEW:
+                orientation, skew = deskew.estimate_rotation(img, templates)
+                if deskew.needs_correction(orientation, skew) and frame is None and partial_decode:
+                    full_page = decode_page(image_path, decode_mode)
+                    if full_page is not None:
+                        img = full_page
+                        orientation, skew = deskew.estimate_rotation(img, templates)
+                if deskew.needs_correction(orientation, skew):
+                    if frame is not None:
+                        frame = deskew.correct_page(frame, orientation, skew)
+                        img = to_bgr(frame)
+                    else:
+                        img = deskew.correct_page(img, orientation, skew)
+                    angle = orientation + skew
+                    stats["rotated_pages"] += 1
+                    stats["reoriented_pages"] += orientation != 0
+
+            stems.append(image_path.stem)
+            angles.append(angle)
+            stats["decoded_bytes"] += img.nbytes
+
+            template, matched = classify_page(img, templates, factor)
+            page_templates.append(template)
+            stats[f"sheet_template_{template.name}"] += 1
+            stats["unmatched_sheet_pages"] += not matched
+
+            # Follow scan drift: shift the template's windows by the page's offset
+            roi_windows, redact_windows, redact_polygons = template.rois(), template.redact, template.redact_polygons
+            start = time.perf_counter()
+            registration = register_page(img, template, factor)
+            stats["registration_seconds"] += time.perf_counter() - start
+            if registration is not None:
+                roi_windows = [registration.shift(box) for box in roi_windows]
+                redact_windows = tuple(registration.shift(box) for box in redact_windows)
+                redact_polygons = tuple(registration.shift_polygon(polygon) for polygon in redact_polygons)
+                stats["registered_pages"] += 1
+
+            # ROI windows on the decoded page (downscaled in the reduced modes)
+            page_crops = [extract_roi(img, scale_coords(coords, factor)) for coords in roi_windows]
+            for roi_crops, crop in zip(crops.values(), page_crops):
+                # Copied so the page itself isn't kept alive until the chunk is recognized
+                roi_crops.append(crop.copy())
+
+            # Blurred, washed-out or empty scans are reported instead of OCR'd
+            quality = None
+            if QUALITY_CHECK and image_path not in redact_only:
+                start = time.perf_counter()
+                quality = assess_rois(page_crops, factor)
+                stats["quality_seconds"] += time.perf_counter() - start
+                stats[f"quality_{quality.verdict}_pages"] += 1
+            qualities.append(quality)
+
+            if image_path in redact_only:
+                skipped.add(len(stems) - 1)
+                stats["redact_only_pages"] += 1
+            if output_folder is not None:
+                # The frame is ours and the ROI crops are copies: the writer may redact it in place
+                output_path = output_path_for(image_path, input_folder, output_folder,
+                                              suffix=output_suffix(image_path, output_profile))
+                yield _PageWrite(image_path, frame, output_path, angle, redact_windows, redact_polygons)
+
+    # Redacting and encoding overlap the next pages' decode on writer threads
+    write = partial(_write_page, output_profile=output_profile, keeps_format=keeps_format)
+    if WRITER_WORKERS <= 1:
+        written = map(write, decoded_pages())
+    else:
+        written = map_bounded(write, decoded_pages(), WRITER_WORKERS, 2 * WRITER_WORKERS)
+    for reencoded, thumbnail in written:
+        stats["reencoded_pages" if reencoded else "lossless_jpeg_pages"] += 1
+        thumbnails.append(thumbnail)
+
+    # Threshold each ROI kind as one stack (padded to its largest ROI), then
+    # interleave: two consecutive ROIs (X, Y) per image
+    raw_x, raw_y = (_stack_crops(roi_crops, gray) for roi_crops in crops.values())
+    rois = [roi for pair in zip(threshold_roi_stack(raw_x), threshold_roi_stack(raw_y)) for roi in pair]
+    raw_rois = [roi for pair in zip(raw_x, raw_y) for roi in pair]
+
+    # Odd indices are Y ROIs, whose header is always printed
+    header_lines = [page_templates[i // 2].y_header_lines if i % 2 else 0 for i in range(len(rois))]
+    profile_names = [{**page_templates[i // 2].profiles(), **(profiles or {})}["Y" if i % 2 else "X"]
+                     for i in range(len(rois))]
+    rejected = {n for n, quality in enumerate(qualities) if quality is not None and quality.verdict == "reject"}
+    rejected |= skipped  # neither is OCR'd
+    active = [i for i, roi in enumerate(rois)
+              if i // 2 not in rejected
+              and not (skip_blank and is_blank_roi(roi, header_lines=header_lines[i], factor=factor))]
+    stats["skipped_blank_rois"] += len(rois) - len(active) - 2 * len(rejected)
+
+    texts, tiers, cropped = [""] * len(rois), [[] for _ in rois], [0] * len(rois)
+
+    # Hand Tesseract only the text box, without the Y header (adaptive re-reads line boxes of the full ROI)
+    if TIGHT_CROP and ocr_mode != "adaptive":
+        for i in active:
+            kind = "Y" if i % 2 else "X"
+            crop, cropped[i] = tight_crop(rois[i], header_lines=header_lines[i], factor=factor)
+            stats[f"tight_crop_rois_{kind}"] += 1
+            stats[f"tight_crop_pixels_saved_{kind}"] += rois[i].size - crop.size
+            rois[i] = crop
+
+    active_results = _recognize_rois(
+        ocr_mode, [raw_rois[i] for i in active], [rois[i] for i in active],
+        [profile_names[i] for i in active], montage_tiles, stats, [cropped[i] for i in active])
+    for i, text, line_tiers, header_cropped in zip(active, *active_results):
+        texts[i], tiers[i], cropped[i] = text, line_tiers, header_cropped
+
+    results = []
+    for n, stem in enumerate(stems):
+        if n in skipped:
+            continue
+        cleaned_text_x, cleaned_text_y = clean_text(
+            texts[2 * n], texts[2 * n + 1], header_lines=header_lines[2 * n + 1] - cropped[2 * n + 1])
+        result = {"X": cleaned_text_x, "Y": cleaned_text_y, "sheet_template": page_templates[n].name,
+                  "angle": angles[n]}
+        if qualities[n] is not None and qualities[n].verdict != "ok":
+            result["quality"] = qualities[n].as_dict()
+        if ocr_mode == "adaptive":
+            result["tiers"] = {"X": tiers[2 * n], "Y": tiers[2 * n + 1]}
+        if thumbnails:
+            result["thumbnail"] = thumbnails[n]
+        results.append((stem, result))
+
+    stats["images"] += len(results)
+    stats.update(cache_stats() - cache_before)
+    return results, stats
+
+
+def run_ocr(image_files: List[Path], ocr_mode: str = "per_roi",
+            montage_tiles: int = montage.DEFAULT_TILES, workers: int = 1,
+            chunk_size: int = DEFAULT_CHUNK_SIZE, ordered: bool = True,
+            profiles: Optional[dict] = None, input_folder: Optional[Path] = None,
+            output_folder: Optional[Path] = None, decode_mode: str = DECODE_MODE,
+            output_profile: str = OUTPUT_PROFILE, redact_only: Collection[Path] = ()) -> Tuple[dict, Counter]:
+    """
+    OCR every image in chunks and build the ocr_results dict.
+
+    Chunks run on a process pool when workers > 1 (see parallel_runner.map_chunks).
+    With output_folder, redacted pages are written from the same decode (see ocr_image_files);
+    pages in redact_only are only written.
+
+    Returns:
+        Tuple[dict, Counter]: {image stem: {"X": [...], "Y": [...]}}, in input order when
+        ordered is True, and the counters summed over all chunks.
+    """
+    if ocr_mode == "montage":
+        # Give every chunk enough ROIs to fill its canvases
+        chunk_size = max(chunk_size, -(-montage_tiles // 2))
+    ocr_chunk = partial(ocr_image_files, ocr_mode=ocr_mode, montage_tiles=montage_tiles, profiles=profiles,
+                        input_folder=input_folder, output_folder=output_folder, decode_mode=decode_mode,
+                        output_profile=output_profile, redact_only=frozenset(redact_only))
+
+    ocr_results = {}
+    stats = Counter()
+    for chunk_results, chunk_stats in map_chunks(ocr_chunk, image_files, workers, chunk_size, ordered):
+        for stem, result in chunk_results:
+            ocr_results[stem] = result
+        stats.update(chunk_stats)
+    return ocr_results, stats
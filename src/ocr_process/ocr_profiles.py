@@ -0,0 +1,95 @@
+import os
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ocr_process.image_processor import text_line_spans
+
+
+# --- Model Locations ---
+# tessdata_fast / tessdata_best checkouts; "default" uses Tesseract's own tessdata
+TESSDATA_DIRS = {
+    "fast": os.environ.get("RFI_TESSDATA_FAST_DIR", ""),
+    "best": os.environ.get("RFI_TESSDATA_BEST_DIR", ""),
+}
+DIGIT_WHITELIST = "0123456789.-="
+
+
+class OCRProfile(NamedTuple):
+    """Tesseract settings and ROI preparation used to read one kind of ROI."""
+    name: str
+    psm: int = 11
+    oem: int = 3
+    whitelist: str = ""
+    model: str = "default"          # "default", "fast" or "best"
+    invert: Optional[bool] = None   # tessedit_do_invert; None keeps Tesseract's default
+    dpi: Optional[int] = None       # user_defined_dpi hint
+    header_lines: int = 0           # text lines cropped from the top before OCR
+    negate: bool = False            # feed dark-on-light text (pairs with invert=False)
+
+    def tessdata_dir(self) -> Optional[str]:
+        return TESSDATA_DIRS.get(self.model) or None
+
+    def variables(self) -> dict:
+        """Tesseract variables (-c name=value) set by this profile."""
+        variables = {}
+        if self.whitelist:
+            variables["tessedit_char_whitelist"] = self.whitelist
+        if self.invert is not None:
+            variables["tessedit_do_invert"] = int(self.invert)
+        if self.dpi:
+            variables["user_defined_dpi"] = self.dpi
+        return variables
+
+    def config(self) -> str:
+        """Command-line config for pytesseract (also part of the OCR cache key)."""
+        parts = [f"--psm {self.psm}", f"--oem {self.oem}"]
+        parts += [f"-c {name}={value}" for name, value in self.variables().items()]
+        if self.tessdata_dir():
+            parts.append(f"--tessdata-dir {self.tessdata_dir()}")
+        return " ".join(parts)
+
+
+# --- Profile Registry ---
+PROFILES = {profile.name: profile for profile in (
+    # The historical single config, used for both ROIs: "--psm 11 --oem 3"
+    OCRProfile("default"),
+    # ROI_X is one column of numbers: a uniform block, digits only
+    OCRProfile("x_digits", psm=6, whitelist=DIGIT_WHITELIST, invert=False, dpi=300, negate=True),
+    OCRProfile("x_digits_fast", psm=6, oem=1, whitelist=DIGIT_WHITELIST, model="fast",
+               invert=False, dpi=300, negate=True),
+    # ROI_Y is a table: drop the two header lines so the whitelist can't mangle them
+    OCRProfile("y_table", psm=6, whitelist=DIGIT_WHITELIST, invert=False, dpi=300,
+               header_lines=2, negate=True),
+    OCRProfile("y_table_fast", psm=6, oem=1, whitelist=DIGIT_WHITELIST, model="fast",
+               invert=False, dpi=300, header_lines=2, negate=True),
+)}
+
+
+def get_profile(name: str) -> OCRProfile:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown OCR profile: {name!r} (expected one of {tuple(PROFILES)})")
+    return PROFILES[name]
+
+
+def prepare_roi(thresholded_roi: np.ndarray, profile: OCRProfile, header_cropped: int = 0) -> Tuple[np.ndarray, int]:
+    """
+    Apply a profile's header crop and polarity to a thresholded ROI.
+
+    Args:
+        thresholded_roi (np.ndarray): ROI from process_roi (or tight_crop).
+        profile (OCRProfile): Profile to apply.
+        header_cropped (int): Header lines already removed from the ROI.
+
+    Returns:
+        Tuple[np.ndarray, int]: The ROI to recognize and how many text lines were cropped in total.
+    """
+    roi, cropped = thresholded_roi, header_cropped
+    header_lines = profile.header_lines - header_cropped
+    if header_lines > 0:
+        spans = text_line_spans(roi)
+        if len(spans) > header_lines:
+            roi, cropped = roi[spans[header_lines][0]:], profile.header_lines
+    if profile.negate:
+        roi = 255 - roi
+    return roi, cropped
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Sequence
+
+
+# --- Executor Defaults ---
+DEFAULT_WORKERS = int(os.environ.get("RFI_OCR_WORKERS", os.cpu_count() or 1))
+DEFAULT_CHUNK_SIZE = 8
+
+
+def omp_thread_limit(workers: int) -> int:
+    """Split the cores between workers so Tesseract's OpenMP threads don't oversubscribe."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+@contextmanager
+def _worker_environment(thread_limit: int):
+    """
+    Environment the pool's workers start with. OpenMP reads OMP_THREAD_LIMIT once,
+    when libtesseract's runtime loads, so it has to be in place before the worker
+    process starts: workers are spawned (a forked worker would inherit a runtime the
+    parent may already have loaded through the engine pool) from this environment.
+    """
+    settings = {
+        "OMP_THREAD_LIMIT": str(thread_limit),
+        # Every worker process already is one unit of parallelism
+        "RFI_OCR_POOL_SIZE": "1",
+    }
+    previous = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def map_chunks(fn: Callable, items: Sequence, workers: Optional[int] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, ordered: bool = True) -> Iterator:
+    """
+    Apply fn to consecutive chunks of items on a process pool.
+
+    Args:
+        fn (Callable): Picklable function taking a list of items.
+        items (Sequence): Work items (e.g. image paths).
+        workers (int, optional): Worker processes; defaults to RFI_OCR_WORKERS or the core count.
+        chunk_size (int): Items submitted per task.
+        ordered (bool): Yield results in submission order instead of completion order.
+
+    Yields:
+        The return value of fn for each chunk.
+    """
+    workers = workers or DEFAULT_WORKERS
+    chunk_size = max(1, chunk_size)
+    chunks = [list(items[start:start + chunk_size]) for start in range(0, len(items), chunk_size)]
+
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+
+    with _worker_environment(omp_thread_limit(workers)), \
+            ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(fn, chunk) for chunk in chunks]
+        for future in (futures if ordered else as_completed(futures)):
+            yield future.result()
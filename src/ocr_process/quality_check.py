@@ -0,0 +1,70 @@
+import os
+from typing import List, NamedTuple, Sequence
+
+import cv2
+import numpy as np
+
+
+# --- Quality Precheck ---
+# Scores over the ROI windows of a decoded page; below "reject" the page isn't OCR'd,
+# below "flag" it is OCR'd but reported.
+QUALITY_CHECK = os.environ.get("RFI_QUALITY_CHECK", "1") == "1"
+INK_LEVEL = 30  # gray levels at or below this count as ink (process_roi's threshold)
+
+THRESHOLDS = {
+    # score: (reject below, flag below)
+    "sharpness": (float(os.environ.get("RFI_QC_REJECT_SHARPNESS", 20)),
+                  float(os.environ.get("RFI_QC_FLAG_SHARPNESS", 100))),      # variance of the Laplacian
+    "contrast": (float(os.environ.get("RFI_QC_REJECT_CONTRAST", 40)),
+                 float(os.environ.get("RFI_QC_FLAG_CONTRAST", 80))),         # 1st-99th percentile gray spread
+    "density": (float(os.environ.get("RFI_QC_REJECT_DENSITY", 0.001)),
+                float(os.environ.get("RFI_QC_FLAG_DENSITY", 0.005))),        # ink pixel ratio
+}
+
+
+class QualityReport(NamedTuple):
+    verdict: str          # "ok", "flag" or "reject"
+    reasons: List[str]
+    sharpness: float
+    contrast: float
+    density: float
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+def _gray(roi: np.ndarray) -> np.ndarray:
+    return roi if roi.ndim == 2 else cv2.cvtColor(np.ascontiguousarray(roi[..., :3]), cv2.COLOR_BGR2GRAY)
+
+
+def assess_rois(rois: Sequence[np.ndarray], factor: int = 1) -> QualityReport:
+    """
+    Score the raw ROI crops of one page; each score is the best over its ROIs,
+    so a page is only rejected when none of its windows is usable.
+
+    `factor` is the crops' decode downscale. Reduced decodes average thin strokes
+    with the paper around them, above INK_LEVEL, so their density is reported
+    but not checked.
+    """
+    grays = [_gray(roi) for roi in rois if roi.size]
+    if not grays:
+        return QualityReport("reject", ["no ROI inside the page"], 0.0, 0.0, 0.0)
+
+    scores = {
+        "sharpness": max(float(cv2.Laplacian(gray, cv2.CV_64F).var()) for gray in grays),
+        "contrast": max(float(np.subtract(*np.percentile(gray, (99, 1)))) for gray in grays),
+        "density": max(float(np.count_nonzero(gray <= INK_LEVEL)) / gray.size for gray in grays),
+    }
+
+    verdict, reasons = "ok", []
+    for name, score in scores.items():
+        if name == "density" and factor > 1:
+            continue
+        reject_below, flag_below = THRESHOLDS[name]
+        if score < reject_below:
+            verdict = "reject"
+            reasons.append(f"{name} {score:.3g} < {reject_below:g}")
+        elif score < flag_below:
+            verdict = "flag" if verdict == "ok" else verdict
+            reasons.append(f"{name} {score:.3g} < {flag_below:g} (flag)")
+    return QualityReport(verdict, reasons, **scores)
@@ -0,0 +1,158 @@
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_process.image_processor import decode_page
+from ocr_process.sheet_templates import Box, Polygon, SheetTemplate
+
+
+# --- Registration Settings ---
+# Pages are matched against their template's reference page by correlating the
+# row and column ink profiles (dominated by the form's table lines) of a downscaled copy.
+REGISTRATION = os.environ.get("RFI_REGISTRATION", "1") == "1"
+SCALE = 4               # profiles are computed at 1/SCALE resolution
+MAX_SHIFT = 48          # full-resolution pixels searched in each direction
+MIN_CORRELATION = 0.3   # weaker peaks (blank or foreign pages) leave the windows unshifted
+
+
+class Profiles(NamedTuple):
+    """Zero-mean ink profiles of a page region at 1/scale resolution."""
+    left_rows: np.ndarray   # row profile of the left half
+    right_rows: np.ndarray  # row profile of the right half
+    columns: np.ndarray
+    width: int              # full-resolution region width
+
+
+class Registration(NamedTuple):
+    """Offset of a page against its reference: dx, and dy at the left/right half centres."""
+    dx: float
+    dy_left: float
+    dy_right: float
+    width: int
+
+    def shift(self, box: Box) -> Box:
+        """Move an (x, y, w, h) window by the offset at its centre (small rotations tilt dy across the page)."""
+        x, y, w, h = box
+        quarter = self.width / 4
+        slope = (self.dy_right - self.dy_left) / (2 * quarter)
+        dy = self.dy_left + slope * (x + w / 2 - quarter)
+        return max(0, x + round(self.dx)), max(0, y + round(dy)), w, h
+
+    def shift_polygon(self, polygon: Polygon) -> Polygon:
+        """Move a polygon by the offset at the centre of its bounding box."""
+        xs, ys = [x for x, _ in polygon], [y for _, y in polygon]
+        box = (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+        x, y, _, _ = self.shift(box)
+        return tuple((px + x - box[0], py + y - box[1]) for px, py in polygon)
+
+    def angle(self) -> float:
+        """Rotation implied by the two row offsets, in degrees."""
+        return float(np.degrees(np.arctan2(self.dy_right - self.dy_left, self.width / 2)))
+
+
+def registration_rows(template: SheetTemplate) -> int:
+    """Page rows used for registration: every window of the template plus the search margin."""
+    bottom = max(y + h for _, y, _, h in template.rois() + template.redact)
+    for polygon in template.redact_polygons:
+        bottom = max(bottom, max(y for _, y in polygon) + 1)
+    return bottom + MAX_SHIFT
+
+
+def page_profiles(page: np.ndarray, rows: int, factor: int = 1, scale: int = SCALE) -> Profiles:
+    """
+    Compute the registration profiles of the top `rows` (full-resolution) rows of a page.
+
+    Args:
+        page (np.ndarray): Page decoded at 1/factor resolution (gray, BGR or BGRA).
+        rows (int): Full-resolution rows to use.
+        factor (int): Decode downscale of the page.
+        scale (int): Downscale of the profiles (at least factor).
+    """
+    region = page[:rows // factor]
+    small = cv2.resize(region, None, fx=factor / scale, fy=factor / scale, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(np.ascontiguousarray(small[..., :3]), cv2.COLOR_BGR2GRAY)
+    ink = 255.0 - small.astype(np.float32)
+    half = ink.shape[1] // 2
+
+    def centred(profile):
+        return profile - profile.mean()
+
+    return Profiles(centred(ink[:, :half].mean(axis=1)), centred(ink[:, half:].mean(axis=1)),
+                    centred(ink.mean(axis=0)), region.shape[1] * factor)
+
+
+def _best_shift(current: np.ndarray, reference: np.ndarray, max_lag: int) -> Tuple[float, float]:
+    """
+    Lag (in profile samples) that best aligns current onto reference, with sub-sample
+    parabolic refinement, and its normalized correlation.
+    """
+    norm = np.linalg.norm(current) * np.linalg.norm(reference)
+    if not norm:
+        return 0.0, 0.0
+    # correlation[k + len(reference) - 1] = sum(current[n + k] * reference[n])
+    correlation = np.correlate(current, reference, mode="full") / norm
+    zero = len(reference) - 1
+    low, high = max(0, zero - max_lag), min(len(correlation), zero + max_lag + 1)
+    peak = low + int(np.argmax(correlation[low:high]))
+
+    offset = 0.0
+    if 0 < peak < len(correlation) - 1:
+        before, at, after = correlation[peak - 1:peak + 2]
+        curvature = before - 2 * at + after
+        if curvature < 0:
+            offset = 0.5 * (before - after) / curvature
+    return peak - zero + offset, float(correlation[peak])
+
+
+def register(page: Profiles, reference: Profiles, scale: int) -> Optional[Registration]:
+    """Offset of a page against its reference, or None when the profiles don't correlate."""
+    max_lag = MAX_SHIFT // scale
+    dx, column_score = _best_shift(page.columns, reference.columns, max_lag)
+    dy_left, left_score = _best_shift(page.left_rows, reference.left_rows, max_lag)
+    dy_right, right_score = _best_shift(page.right_rows, reference.right_rows, max_lag)
+    if min(column_score, left_score, right_score) < MIN_CORRELATION:
+        return None
+    return Registration(dx * scale, dy_left * scale, dy_right * scale, reference.width)
+
+
+# --- Reference Cache ---
+# Reference profiles per (template name, scale), computed once per process
+_references: Dict[Tuple[str, int], Optional[Profiles]] = {}
+_reference_lock = threading.Lock()
+
+
+def reference_profiles(template: SheetTemplate, factor: int = 1) -> Optional[Profiles]:
+    """Profiles of a template's reference page (None when it has none or it can't be read)."""
+    key = (template.name, max(SCALE, factor))
+    with _reference_lock:
+        if key not in _references:
+            page = decode_page(template.reference, "gray") if template.reference else None
+            _references[key] = (page_profiles(page, registration_rows(template), scale=key[1])
+                                if page is not None else None)
+        return _references[key]
+
+
+def register_page(page: np.ndarray, template: SheetTemplate, factor: int = 1) -> Optional[Registration]:
+    """
+    Register a decoded page against its template's reference page.
+
+    Returns:
+        Optional[Registration]: The offset to apply to the template's windows, or None
+        when registration is off, the template has no reference or no match was found.
+    """
+    if not REGISTRATION:
+        return None
+    reference = reference_profiles(template, factor)
+    if reference is None:
+        return None
+    scale = max(SCALE, factor)
+    return register(page_profiles(page, registration_rows(template), factor, scale), reference, scale)
+
+
+def registration_windows(templates: Dict[str, SheetTemplate]) -> List[Box]:
+    """Extra page windows registration reads (for decode_roi_rows)."""
+    return [(0, 0, 1, registration_rows(template)) for template in templates.values() if template.reference]
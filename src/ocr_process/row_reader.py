@@ -0,0 +1,79 @@
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_process.image_processor import text_line_spans
+from ocr_process.ocr_profiles import OCRProfile
+from ocr_process.text_extractor import extract_rois
+
+
+# --- Row Settings ---
+ROW_PSM = 7        # treat the image as a single text line
+ROW_PADDING = 4    # background added around every row crop
+
+
+def split_rows(thresholded_roi: np.ndarray, skip_lines: int = 0,
+               padding: int = ROW_PADDING) -> Tuple[List[np.ndarray], int]:
+    """
+    Split a thresholded ROI into one padded crop per text line (horizontal projection).
+
+    Each crop extends up to `padding` rows past its line without reaching into
+    the neighbouring lines, then gets a `padding` background border.
+
+    Args:
+        thresholded_roi (np.ndarray): ROI from process_roi (or tight_crop).
+        skip_lines (int): Leading lines (e.g. a header) left out, when more lines follow.
+        padding (int): Margin around each line.
+
+    Returns:
+        Tuple[List[np.ndarray], int]: Row crops, top to bottom, and how many lines were skipped.
+    """
+    spans = text_line_spans(thresholded_roi)
+    height = thresholded_roi.shape[0]
+    skipped = skip_lines if len(spans) > skip_lines else 0
+    rows = []
+    for n in range(skipped, len(spans)):
+        top, bottom = spans[n]
+        floor = spans[n - 1][1] if n else 0
+        ceiling = spans[n + 1][0] if n + 1 < len(spans) else height
+        row = thresholded_roi[max(floor, top - padding):min(ceiling, bottom + padding)]
+        rows.append(cv2.copyMakeBorder(row, padding, padding, padding, padding, cv2.BORDER_CONSTANT, value=0))
+    return rows, skipped
+
+
+def row_profile(profile: OCRProfile) -> OCRProfile:
+    """Single-line variant of a profile; its header crop is done by split_rows instead."""
+    return profile._replace(name=f"{profile.name}_row", psm=ROW_PSM, header_lines=0)
+
+
+def extract_rois_by_rows(rois: Sequence[np.ndarray], profile: OCRProfile,
+                         header_cropped: Sequence[int]) -> Tuple[List[str], List[int]]:
+    """
+    OCR ROIs row by row: the rows of every ROI are recognized as one batch
+    (spread over the engine pool), then joined back into one text per ROI.
+
+    Args:
+        rois (Sequence[np.ndarray]): Thresholded ROIs of one kind.
+        profile (OCRProfile): Profile of that ROI kind; its header_lines rows are skipped.
+        header_cropped (Sequence[int]): Header lines already removed from each ROI.
+
+    Returns:
+        Tuple[List[str], List[int]]: One text per ROI (one line per row) and the
+        header lines removed from each ROI in total.
+    """
+    single_line = row_profile(profile)
+    rows, owners, cropped = [], [], []
+    for i, (roi, already_cropped) in enumerate(zip(rois, header_cropped)):
+        skip = max(0, profile.header_lines - already_cropped)
+        roi_rows, skipped = split_rows(roi, skip_lines=skip)
+        cropped.append(already_cropped + skipped)
+        for row in roi_rows:
+            rows.append(255 - row if profile.negate else row)
+            owners.append(i)
+
+    lines = [[] for _ in rois]
+    for owner, text in zip(owners, extract_rois(rows, single_line)):
+        if text:
+            lines[owner].append(text)
+    return ["\n".join(roi_lines) for roi_lines in lines], cropped
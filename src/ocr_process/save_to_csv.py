@@ -1,6 +1,8 @@
 import csv
 import os
 
+from ocr_process.vh_classifier import split_stem
+
 def ensure_list(val):
     """Ensure the value is a list."""
     if isinstance(val, list):
@@ -16,17 +18,20 @@ def save_side_by_side_csv(data_dict, output_filename):
     - One section for 'V' orientation, one for 'H' orientation per base name.
     - First writes a summary table with Base, V-image, H-image columns.
     - Then writes the detailed Ref X / Ref Y rows for each base.
+
+    A value's 'orientation' (and 'base') keys, set from vh_classifier.plan_pairs,
+    take precedence over the image stem's _V / _H suffix.
     """
     os.makedirs(os.path.dirname(output_filename), exist_ok=True)
 
     # Build mapping: base_name -> {'V': {...}, 'H': {...}}
     paired_data = {}
     for image_stem, values in data_dict.items():
-        # split on last underscore to detect orientation suffix
-        parts = image_stem.rsplit('_', 1)
-        if len(parts) == 2 and parts[1] in ('V', 'H'):
-            base, orientation = parts
-        else:
+        # assigned orientation first, else the suffix after the last underscore
+        base, orientation = split_stem(image_stem)
+        if 'orientation' in values:
+            base, orientation = values.get('base', base), values['orientation']
+        if orientation is None:
             # skip any stems without _V or _H
             continue
         paired_data.setdefault(base, {})[orientation] = {
@@ -0,0 +1,136 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from black_roi.blackening_roi import REDACT_REGION
+from ocr_process.image_processor import ROI_PROFILES, ROI_X_COORDS, ROI_Y_COORDS, ROI_Y_HEADER_LINES
+
+Box = Tuple[int, int, int, int]  # (x, y, w, h) on the full-resolution page
+Polygon = Tuple[Tuple[int, int], ...]  # (x, y) vertices on the full-resolution page
+
+
+# --- Layout Classifier ---
+# Pages are matched by an average hash of their top rows (full width)
+HEADER_ROWS = 128
+HASH_SIZE = 8  # 8x8 cells -> 64-bit signature
+MAX_DISTANCE = int(os.environ.get("RFI_TEMPLATE_MAX_DISTANCE", 10))  # differing bits still accepted
+TEMPLATES_PATH = os.environ.get("RFI_TEMPLATES", "")
+
+
+class SheetTemplate(NamedTuple):
+    """One RFI sheet layout: where the values are, what to redact and how to read it."""
+    name: str
+    roi_x: Box = ROI_X_COORDS
+    roi_y: Box = ROI_Y_COORDS
+    redact: Tuple[Box, ...] = (REDACT_REGION,)
+    redact_polygons: Tuple[Polygon, ...] = ()  # non-rectangular areas to redact
+    profile_x: str = ROI_PROFILES["X"]
+    profile_y: str = ROI_PROFILES["Y"]
+    y_header_lines: int = ROI_Y_HEADER_LINES
+    signature: Optional[int] = None  # header_signature of a reference page
+    reference: str = ""              # well-aligned page that scans are registered against
+
+    def rois(self) -> Tuple[Box, Box]:
+        return self.roi_x, self.roi_y
+
+    def profiles(self) -> dict:
+        return {"X": self.profile_x, "Y": self.profile_y}
+
+
+# The hardcoded layout every deployment used so far
+DEFAULT_TEMPLATE = SheetTemplate("default", reference=os.environ.get("RFI_REFERENCE_PAGE", ""))
+
+
+# --- Registry ---
+def load_templates(path: str = TEMPLATES_PATH) -> Dict[str, SheetTemplate]:
+    """
+    Load the template registry from a JSON file:
+    {"<name>": {"roi_x": [x, y, w, h], "roi_y": [...], "redact": [[x, y, w, h], ...],
+                "redact_polygons": [[[x, y], [x, y], ...], ...],
+                "profile_x": "...", "profile_y": "...", "y_header_lines": 2, "signature": "<hex>",
+                "reference": "<page relative to the JSON file>"}}.
+    Missing fields take the default sheet's values. Without a file, only DEFAULT_TEMPLATE exists.
+    """
+    if not path:
+        return {DEFAULT_TEMPLATE.name: DEFAULT_TEMPLATE}
+
+    templates = {}
+    for name, spec in json.loads(Path(path).read_text(encoding="utf-8")).items():
+        templates[name] = SheetTemplate(
+            name,
+            roi_x=tuple(spec.get("roi_x", DEFAULT_TEMPLATE.roi_x)),
+            roi_y=tuple(spec.get("roi_y", DEFAULT_TEMPLATE.roi_y)),
+            redact=tuple(tuple(box) for box in spec.get("redact", DEFAULT_TEMPLATE.redact)),
+            redact_polygons=tuple(tuple(tuple(point) for point in polygon)
+                                  for polygon in spec.get("redact_polygons", ())),
+            profile_x=spec.get("profile_x", DEFAULT_TEMPLATE.profile_x),
+            profile_y=spec.get("profile_y", DEFAULT_TEMPLATE.profile_y),
+            y_header_lines=spec.get("y_header_lines", DEFAULT_TEMPLATE.y_header_lines),
+            signature=int(spec["signature"], 16) if spec.get("signature") else None,
+            reference=str(Path(path).parent / spec["reference"]) if spec.get("reference") else "",
+        )
+    if not templates:
+        raise ValueError(f"No template defined in {path}")
+    return templates
+
+
+_templates = None
+
+
+def get_templates() -> Dict[str, SheetTemplate]:
+    """Load the registry configured by RFI_TEMPLATES once per process."""
+    global _templates
+    if _templates is None:
+        _templates = load_templates()
+    return _templates
+
+
+def template_windows(templates: Dict[str, SheetTemplate]) -> List[Box]:
+    """Every page window a run reads: all ROIs plus the header band (for decode_roi_rows)."""
+    windows = [(0, 0, 1, HEADER_ROWS)]
+    for template in templates.values():
+        windows += template.rois()
+    return windows
+
+
+# --- Classification ---
+def header_signature(page: np.ndarray, factor: float = 1) -> int:
+    """
+    64-bit average hash of the top HEADER_ROWS rows of a page (gray, BGR or BGRA).
+
+    `factor` is the page's decode downscale, so reduced decodes hash the same band.
+    """
+    band = page[:max(1, int(HEADER_ROWS / factor))]
+    small = cv2.resize(band, (HASH_SIZE, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(np.ascontiguousarray(small[..., :3]), cv2.COLOR_BGR2GRAY)
+    bits = (small > small.mean()).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def classify_page(page: np.ndarray, templates: Dict[str, SheetTemplate],
+                  factor: int = 1, max_distance: int = MAX_DISTANCE) -> Tuple[SheetTemplate, bool]:
+    """
+    Assign a page its template: the one whose signature is nearest in Hamming distance.
+
+    Registries without signatures (e.g. the default single template) skip hashing.
+    Pages farther than max_distance from every signature get the "default" template
+    (or the first one registered).
+
+    Returns:
+        Tuple[SheetTemplate, bool]: The template and whether it was matched (not a fallback).
+    """
+    fallback = templates.get(DEFAULT_TEMPLATE.name) or next(iter(templates.values()))
+    candidates = [template for template in templates.values() if template.signature is not None]
+    if not candidates:
+        return fallback, True
+
+    signature = header_signature(page, factor)
+    best = min(candidates, key=lambda template: bin(signature ^ template.signature).count("1"))
+    if bin(signature ^ best.signature).count("1") > max_distance:
+        return fallback, False
+    return best, True
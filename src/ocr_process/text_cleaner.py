@@ -2,7 +2,7 @@ import re
 from typing import Tuple, List
 
 
-def clean_text(text_x: str, text_y: str) -> Tuple[List[str], List[str]]:
+def clean_text(text_x: str, text_y: str, header_lines: int = 2) -> Tuple[List[str], List[str]]:
     """
     Cleans OCR text from ROI_X and ROI_Y.
     
@@ -12,13 +12,14 @@ def clean_text(text_x: str, text_y: str) -> Tuple[List[str], List[str]]:
     Args:
         text_x (str): OCR result from ROI_X.
         text_y (str): OCR result from ROI_Y.
+        header_lines (int): Header lines to skip in text_y (0 when the header was cropped before OCR).
 
     Returns:
         Tuple[List[str], List[str]]: Cleaned values from ROI_X and ROI_Y.
     """
     # --- Clean ROI_Y ---
     lines_y = text_y.strip().splitlines()
-    data_lines_y = lines_y[2:] if len(lines_y) > 2 else lines_y
+    data_lines_y = lines_y[header_lines:] if len(lines_y) > header_lines else lines_y
     cleaned_text_y = '\n'.join(data_lines_y)
 
     # Replace leading '=' with '-'
@@ -1,16 +1,77 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import pytesseract
 
+from ocr_process import engine_pool
+from ocr_process.ocr_cache import cached_recognize
+from ocr_process.ocr_profiles import PROFILES, OCRProfile
+
 # Hardcoded Tesseract path for Windows deployment
 #pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 #pytesseract.pytesseract.tesseract_cmd = r'C:\Users\USER\AppData\Local\Tesseract-OCR\tesseract.exe'
 
+TESSERACT_CONFIG = r"--psm 11 --oem 3"  # same as PROFILES["default"].config()
+
+# "auto" uses the in-process engine pool when tesserocr is installed,
+# "pool" requires it, "subprocess" always shells out through pytesseract.
+OCR_BACKEND = os.environ.get("RFI_OCR_BACKEND", "auto")
+# Tesseract processes run at once when shelling out (the engine pool's size setting,
+# which parallel_runner workers set to 1)
+SUBPROCESS_WORKERS = int(os.environ.get("RFI_OCR_POOL_SIZE", os.cpu_count() or 1))
+
+
+def _use_pool():
+    if OCR_BACKEND == "subprocess":
+        return False
+    if OCR_BACKEND == "pool":
+        return True
+    return engine_pool.is_available()
+
+
+def _profile_pool(profile):
+    return engine_pool.get_pool(psm=profile.psm, oem=profile.oem,
+                                variables=profile.variables(), path=profile.tessdata_dir())
+
+def _recognize(image, profile=PROFILES["default"]):
+    if _use_pool():
+        return _profile_pool(profile).recognize(image)
+    return pytesseract.image_to_string(image, config=profile.config()).strip()
+
+def _recognize_many(images, profile=PROFILES["default"]):
+    if _use_pool():
+        return _profile_pool(profile).recognize_many(images)
+    images = list(images)
+    if SUBPROCESS_WORKERS < 2 or len(images) < 2:
+        return [_recognize(image, profile) for image in images]
+    # Each call only waits on its own tesseract process, so threads overlap them
+    with ThreadPoolExecutor(max_workers=min(SUBPROCESS_WORKERS, len(images))) as executor:
+        return list(executor.map(partial(_recognize, profile=profile), images))
+
 def _extract_process(text):
-    myconfig = r"--psm 11 --oem 3"
-    text = pytesseract.image_to_string(text, config=myconfig).strip()
-    return text
+    # Results are cached by ROI content + config (see ocr_cache)
+    return cached_recognize([text], _recognize_many, TESSERACT_CONFIG)[0]
 
 def extract_from_image(processed_x, processed_y):
     """Processes two processed images using the same steps."""
     extracted_x = _extract_process(processed_x)
     extracted_y = _extract_process(processed_y)
     return extracted_x, extracted_y
+
+def extract_many(pairs):
+    """
+    Batch variant of extract_from_image.
+
+    Args:
+        pairs (Iterable[Tuple[np.ndarray, np.ndarray]]): (processed_x, processed_y) per image.
+
+    Returns:
+        list[Tuple[str, str]]: (text_x, text_y) per image, in input order.
+    """
+    texts = extract_rois([roi for pair in pairs for roi in pair])
+    return list(zip(texts[0::2], texts[1::2]))
+
+def extract_rois(rois, profile: OCRProfile = PROFILES["default"]):
+    """Recognize a flat list of prepared ROIs with one OCR profile; returns one text per ROI."""
+    return cached_recognize(list(rois), partial(_recognize_many, profile=profile), profile.config())
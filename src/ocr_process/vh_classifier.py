@@ -0,0 +1,156 @@
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ocr_process.image_processor import decode_page
+
+
+# --- V/H Classifier ---
+# Pages are reduced to a tiny layout thumbnail and matched to the nearest V / H prototype
+ORIENTATIONS = ("V", "H")
+FEATURE_SIZE = 32                 # thumbnail side (pixels) of the layout feature
+ASPECT_WEIGHT = 4.0               # weight of log(height / width) next to the unit-norm thumbnail
+FEATURE_DECODE_MODE = "gray_reduced8"
+MIN_MARGIN = float(os.environ.get("RFI_VH_MIN_MARGIN", 0.05))  # similarity gap needed to trust a guess
+PROTOTYPES_PATH = os.environ.get("RFI_VH_PROTOTYPES", "")
+
+
+def split_stem(stem: str) -> Tuple[str, Optional[str]]:
+    """Split "<base>_V" / "<base>_H" into (base, orientation); other stems get (stem, None)."""
+    parts = stem.rsplit("_", 1)
+    if len(parts) == 2 and parts[1] in ORIENTATIONS:
+        return parts[0], parts[1]
+    return stem, None
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def layout_features(image_path: Path) -> Optional[np.ndarray]:
+    """Layout feature of a page (None if unreadable): its ink thumbnail plus its aspect ratio."""
+    page = decode_page(image_path, FEATURE_DECODE_MODE)
+    if page is None:
+        return None
+    small = cv2.resize(page, (FEATURE_SIZE, FEATURE_SIZE), interpolation=cv2.INTER_AREA)
+    ink = 255.0 - small.astype(np.float32).ravel()
+    aspect = ASPECT_WEIGHT * np.log(page.shape[0] / page.shape[1])
+    return _unit(np.append(_unit(ink - ink.mean()), aspect)).astype(np.float32)
+
+
+# --- Prototypes ---
+def build_prototypes(samples: Iterable[Tuple[np.ndarray, str]]) -> Dict[str, np.ndarray]:
+    """Mean feature per orientation over (feature, "V"/"H") samples."""
+    grouped = {}
+    for vector, orientation in samples:
+        grouped.setdefault(orientation, []).append(vector)
+    return {orientation: _unit(np.mean(vectors, axis=0)) for orientation, vectors in grouped.items()}
+
+
+def save_prototypes(prototypes: Dict[str, np.ndarray], path: str):
+    np.savez_compressed(path, **prototypes)
+
+
+def load_prototypes(path: str = PROTOTYPES_PATH) -> Dict[str, np.ndarray]:
+    """Prototypes saved by 'benchmark.py vh-prototypes' (empty when RFI_VH_PROTOTYPES isn't set)."""
+    if not path or not os.path.exists(path):
+        return {}
+    data = np.load(path)
+    return {orientation: data[orientation] for orientation in ORIENTATIONS if orientation in data}
+
+
+def classify(vector: np.ndarray, prototypes: Dict[str, np.ndarray]) -> Tuple[Optional[str], float]:
+    """
+    Nearest-prototype orientation and its margin over the other one.
+
+    Returns (None, margin) when both prototypes aren't available or the margin is below MIN_MARGIN.
+    """
+    if any(orientation not in prototypes for orientation in ORIENTATIONS):
+        return None, 0.0
+    similarity = {orientation: float(vector @ prototypes[orientation]) for orientation in ORIENTATIONS}
+    best, other = sorted(ORIENTATIONS, key=similarity.get, reverse=True)
+    margin = similarity[best] - similarity[other]
+    return (best if margin >= MIN_MARGIN else None), margin
+
+
+# --- Pairing Plan ---
+class PairingPlan(NamedTuple):
+    """What to OCR: the V/H label of every pairable page and the pages left out."""
+    labels: Dict[str, Tuple[str, str]]   # image stem -> (base, orientation)
+    pages: List[Path]                    # pages to OCR, in input order
+    unpairable: List[Tuple[Path, str]]   # (page, reason), redacted but not worth OCR
+    stats: Counter
+
+
+def plan_pairs(image_files: Iterable[Path], prototypes: Optional[Dict[str, np.ndarray]] = None) -> PairingPlan:
+    """
+    Assign every page its base name and V/H orientation before any OCR.
+
+    The filename suffix is used when present. A page without one keeps its
+    stem as base, so it can only pair with a "<stem>_V" / "<stem>_H" page of
+    the batch; the classifier (prototypes from RFI_VH_PROTOTYPES, refined with
+    the batch's own suffixed pages) gives it its orientation, and overrides a
+    suffix it confidently disagrees with. Pages are only decoded for layout
+    features when the classifier has work: a suffix-less page with a partner,
+    or stored prototypes to check suffixes against.
+    Pages with no orientation or partner, or a second page for an already
+    taken (base, orientation) slot, are reported as unpairable; suffixed
+    pages claim their slots first.
+    """
+    image_files = list(image_files)
+    splits = {path: split_stem(path.stem) for path in image_files}
+    suffixed_bases = {base for base, suffix in splits.values() if suffix}
+    lone = {path for path, (base, suffix) in splits.items() if suffix is None and base not in suffixed_bases}
+    unlabeled = [path for path, (_, suffix) in splits.items() if suffix is None and path not in lone]
+
+    stored = load_prototypes() if prototypes is None else prototypes
+    featured = [path for path in image_files if path not in lone] if unlabeled or stored else []
+    features = {path: layout_features(path) for path in featured}
+
+    labeled = [(vector, splits[path][1]) for path, vector in features.items()
+               if vector is not None and splits[path][1]]
+    batch = build_prototypes(labeled)
+    prototypes = {orientation: _unit(sum(found[orientation] for found in (stored, batch) if orientation in found))
+                  for orientation in ORIENTATIONS if orientation in stored or orientation in batch}
+
+    labels, paired, unpairable, stats = {}, set(), [], Counter()
+    taken = set()
+    for path in sorted(image_files, key=lambda path: splits[path][1] is None):
+        base, suffix = splits[path]
+        if path in lone:
+            unpairable.append((path, f"no _V/_H suffix and no {base}_V / {base}_H page to pair with"))
+            continue
+        if path in features and features[path] is None:
+            unpairable.append((path, "unreadable"))
+            continue
+        predicted, _ = classify(features[path], prototypes) if path in features else (None, 0.0)
+
+        if suffix is None:
+            if predicted is None:
+                unpairable.append((path, "no _V/_H suffix and the layout is ambiguous"))
+                continue
+            orientation = predicted
+            stats["vh_assigned_pages"] += 1
+        elif predicted is not None and predicted != suffix:
+            orientation = predicted
+            stats["vh_conflicting_pages"] += 1
+        else:
+            orientation = suffix
+
+        if (base, orientation) in taken:
+            unpairable.append((path, f"another page is already {base}_{orientation}"))
+            continue
+        taken.add((base, orientation))
+        labels[path.stem] = (base, orientation)
+        paired.add(path)
+
+    order = {path: i for i, path in enumerate(image_files)}
+    unpairable.sort(key=lambda item: order[item[0]])
+    stats["vh_decoded_pages"] += len(features)
+    stats["unpairable_pages"] += len(unpairable)
+    return PairingPlan(labels, [path for path in image_files if path in paired], unpairable, stats)
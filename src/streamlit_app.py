@@ -7,22 +7,21 @@ and the base folder name: <Ref-X1>_<Ref-X2>_<base_name>.<ext>.
 '''
 
 import streamlit as st
-from black_roi.blackening_roi import black_roi
-from black_roi.folder_importer import process_images
 
-from ocr_process.image_processor import process_roi_x, process_roi_y
-from ocr_process.text_extractor import extract_from_image
-from ocr_process.text_cleaner import clean_text
+from black_roi.folder_importer import OUTPUT_PROFILE, OUTPUT_PROFILES, build_manifest
+from ocr_process.image_processor import IMAGE_EXTENSIONS
+from ocr_process.montage import DEFAULT_TILES
+from ocr_process.ocr_pipeline import OCR_MODES, run_ocr
+from ocr_process.parallel_runner import DEFAULT_WORKERS
 from ocr_process.save_to_csv import save_side_by_side_csv
+from ocr_process.vh_classifier import plan_pairs
 
 from pathlib import Path
-import cv2
 import zipfile
 import py7zr
 import shutil
 import tempfile
 import os
-from PIL import Image
 
 # === Utilities ===
 def save_uploaded_files(uploaded_files, temp_dir="uploaded_data"):
@@ -60,10 +59,6 @@ def extract_archives_if_needed(file_paths, extract_dir):
     return extracted_folders
 
 
-def collect_image_files_recursive(root_folder: Path, image_extensions=('.png', '.jpg', '.jpeg', '.tif', '.tiff')):
-    return [p for p in root_folder.rglob("*") if p.suffix.lower() in image_extensions and p.is_file()]
-
-
 def zip_folder(folder_path: Path, zip_name: Path):
     shutil.make_archive(str(zip_name.with_suffix('')), 'zip', str(folder_path))
     return zip_name
@@ -74,7 +69,10 @@ def rename_with_refx(output_folder: Path, ocr_results: dict, base_name: str):
     """
     Rename each file in output_folder whose stem contains a key from ocr_results,
     using the first two 'X' entries and the base_name.
+
+    Returns a dict mapping each renamed original stem to its new file name.
     """
+    renamed = {}
     for original_stem, texts in ocr_results.items():
         # get first two cleaned X entries
         ref_list = texts.get('X', [])
@@ -87,37 +85,55 @@ def rename_with_refx(output_folder: Path, ocr_results: dict, base_name: str):
                 suffix = img_path.suffix
                 new_name = f"{ref1}_{ref2}_{base_name}{suffix}"
                 img_path.rename(output_folder / new_name)
+                renamed[original_stem] = new_name
+    return renamed
 
 
-def run_pipeline(image_folder: Path, image_files: list[Path], base_name: str):
+def run_pipeline(image_folder: Path, image_files: list[Path], base_name: str,
+                 ocr_mode: str = "per_roi", montage_tiles: int = DEFAULT_TILES,
+                 workers: int = DEFAULT_WORKERS, write_images: bool = True, vh_labels: dict = None,
+                 output_profile: str = OUTPUT_PROFILE, redact_only: list[Path] = ()):
     """
     Execute the full OCR pipeline:
-    1. ROI blackening,
-    2. OCR extraction,
-    3. Cleaning,
-    4. Save CSV,
-    5. Rename images by Ref-X.
+    1. Decode each page once; from that frame
+       - ROI blackening (written to the output folder) and a preview thumbnail,
+       - OCR extraction (one of ocr_pipeline.OCR_MODES),
+       spread over `workers` processes,
+    2. Cleaning,
+    3. Save CSV,
+    4. Rename images by Ref-X.
+
+    With write_images=False no redacted pages or previews are produced, and only
+    the rows down to the last ROI are decoded (CSV-only runs). vh_labels
+    ({stem: (base, "V"/"H")}, see vh_classifier.plan_pairs) decides the CSV pairing;
+    redact_only pages (e.g. its unpairable ones) are redacted and written but not OCR'd.
+    output_profile picks how redacted pages are encoded (see folder_importer.OUTPUT_PROFILES).
+
+    Returns the output folder, the CSV path, the run summary counters, the
+    gallery previews ({caption: JPEG bytes}) and the quality precheck reports
+    of flagged or rejected pages ({stem: report}); rejected pages stay out of the CSV.
     """
     # Prepare output
     output_folder = image_folder / f"{base_name}_output"
     intermediate_csv = output_folder / f"{base_name}.csv"
 
-    # Black ROI: writes processed images into output_folder
-    process_images(image_folder, black_roi, output_folder_name=output_folder.name)
+    output_folder.mkdir(parents=True, exist_ok=True)
     if intermediate_csv.exists():
         os.remove(intermediate_csv)
 
-    # OCR & clean
-    ocr_results = {}
-    for image_path in image_files:
-        img = cv2.imread(str(image_path))
-        if img is None:
-            continue
-        roi_x = process_roi_x(img)
-        roi_y = process_roi_y(img)
-        text_x, text_y = extract_from_image(roi_x, roi_y)
-        cleaned_text_x, cleaned_text_y = clean_text(text_x, text_y)
-        ocr_results[image_path.stem] = {"X": cleaned_text_x, "Y": cleaned_text_y}
+    # Black ROI + OCR & clean, sharing one decode per page
+    redact_only = list(redact_only) if write_images else []
+    ocr_results, summary = run_ocr(list(image_files) + redact_only, ocr_mode=ocr_mode, montage_tiles=montage_tiles,
+                                   workers=workers, input_folder=image_folder,
+                                   output_folder=output_folder if write_images else None,
+                                   output_profile=output_profile, redact_only=redact_only)
+    thumbnails = {stem: result.pop("thumbnail") for stem, result in ocr_results.items() if "thumbnail" in result}
+    for stem, (base, orientation) in (vh_labels or {}).items():
+        if stem in ocr_results:
+            ocr_results[stem].update(base=base, orientation=orientation)
+    quality_issues = {stem: result["quality"] for stem, result in ocr_results.items() if "quality" in result}
+    ocr_results = {stem: result for stem, result in ocr_results.items()
+                   if quality_issues.get(stem, {}).get("verdict") != "reject"}
 
     # Ensure folder exists and save CSV
     output_folder.mkdir(exist_ok=True)
@@ -125,20 +141,46 @@ def run_pipeline(image_folder: Path, image_files: list[Path], base_name: str):
     save_side_by_side_csv(ocr_results, output_csv)
 
     # Rename based on Ref-X values
-    rename_with_refx(output_folder, ocr_results, base_name)
+    renamed = rename_with_refx(output_folder, ocr_results, base_name)
+    previews = {renamed.get(stem, stem): thumbnail for stem, thumbnail in thumbnails.items()}
 
-    return output_folder, output_csv
+    return output_folder, output_csv, summary, previews, quality_issues
 
 
-def show_image_gallery(folder: Path):
-    image_files = sorted(folder.glob("*"))
-    images = [Image.open(img) for img in image_files if img.suffix.lower() in [".png", ".jpg", ".jpeg", ".tif", ".tiff"]]
-    if images:
+def show_image_gallery(previews: dict):
+    """Show the thumbnails produced while processing ({caption: JPEG bytes})."""
+    if previews:
         st.markdown("### 🖼️ Preview of Processed Images:")
         cols = st.columns(3)
-        for i, img in enumerate(images):
+        for i, (caption, thumbnail) in enumerate(sorted(previews.items())):
             with cols[i % 3]:
-                st.image(img, use_column_width=True, caption=image_files[i].name)
+                st.image(thumbnail, use_column_width=True, caption=caption)
+
+
+def show_quality_issues(quality_issues: dict):
+    """List pages the quality precheck rejected (not OCR'd) or flagged."""
+    if quality_issues:
+        st.markdown("### 🔍 Scan Quality:")
+        st.table([{"Image": stem, "Verdict": report["verdict"], "Reasons": "; ".join(report["reasons"])}
+                  for stem, report in sorted(quality_issues.items())])
+
+
+def show_run_summary(summary: dict):
+    if not summary:
+        return
+    st.markdown("### 📊 Run Summary:")
+    if "cache_saved_seconds" in summary:
+        hits = summary.get("cache_memory_hits", 0) + summary.get("cache_disk_hits", 0)
+        st.caption(f"OCR cache: {hits} hit(s), {summary.get('cache_misses', 0)} miss(es), "
+                   f"~{summary['cache_saved_seconds']:.1f}s of Tesseract time saved")
+    if summary.get("rotated_pages"):
+        st.caption(f"Deskew: {summary['rotated_pages']} page(s) rotated, "
+                   f"{summary.get('reoriented_pages', 0)} of them sideways or upside down")
+    for kind in ("X", "Y"):
+        if summary.get(f"tight_crop_rois_{kind}"):
+            saved = summary[f"tight_crop_pixels_saved_{kind}"] / summary[f"tight_crop_rois_{kind}"]
+            st.caption(f"Tight crop: {saved:.0f} pixel(s) saved per ROI_{kind}")
+    st.json(dict(summary), expanded=False)
 
 # === Streamlit UI ===
 st.set_page_config(page_title="OCR Text Extractor", page_icon="🧠", layout="centered")
@@ -146,10 +188,22 @@ st.title("🧠 OCR Text Extraction Pipeline")
 
 uploaded_files = st.file_uploader(
     "📁 Upload images or archives (.png, .jpg, .rar, .7z, .zip)",
-    type=["png", "jpg", "jpeg", "tif", "tiff", "rar", "7z", "zip"],
+    type=[extension.lstrip(".") for extension in IMAGE_EXTENSIONS] + ["rar", "7z", "zip"],
     accept_multiple_files=True
 )
 
+with st.expander("⚙️ OCR settings"):
+    ocr_mode = st.selectbox("OCR mode", OCR_MODES, help="'montage' recognizes many ROIs per Tesseract call; "
+                                                  "'rows' reads every text line on its own (--psm 7).")
+    montage_tiles = st.number_input("ROIs per montage", min_value=2, max_value=128, value=DEFAULT_TILES, step=2)
+    workers = st.number_input("OCR worker processes", min_value=1, max_value=64, value=DEFAULT_WORKERS)
+    write_images = st.checkbox("Write redacted images", value=True,
+                               help="Uncheck for a CSV-only run: pages are only decoded down to the last ROI.")
+    output_profile = st.selectbox("Redacted image encoding", list(OUTPUT_PROFILES),
+                                  index=list(OUTPUT_PROFILES).index(OUTPUT_PROFILE),
+                                  help="'same' keeps each page's format; the others trade file size for "
+                                       "encoding speed (compare them with 'benchmark.py encode').")
+
 if uploaded_files:
     st.success(f"Uploaded {len(uploaded_files)} file(s).")
     if st.button("🚀 Run OCR on Uploaded Files / Archives"):
@@ -160,17 +214,33 @@ if uploaded_files:
                 extracted_dirs = extract_archives_if_needed(file_paths, Path(temp_dir))
                 archive_file = next((f for f in file_paths if f.suffix.lower() in [".zip", ".rar", ".7z"]), None)
                 base_name = archive_file.stem if archive_file else image_folder.name
-                all_images = [f for f in file_paths if f.suffix.lower() in [".png", ".jpg", ".jpeg", ".tif", ".tiff"]]
-                for d in extracted_dirs:
-                    all_images += collect_image_files_recursive(d)
+                # One manifest, built once, for every stage
+                all_images = build_manifest(file_paths, extracted_dirs)
+                # Pair pages as V/H before OCR, so pages that can't be paired aren't read
+                plan = plan_pairs(all_images) if all_images else None
+                unpairable = [path for path, _ in plan.unpairable] if plan else []
+                if unpairable:
+                    action = "redacted but not OCR'd" if write_images else "skipped"
+                    st.warning(f"⚠️ {len(unpairable)} page(s) can't be paired and will be {action}:\n\n"
+                               + "\n".join(f"- {path.name}: {reason}" for path, reason in plan.unpairable))
                 if not all_images:
                     st.warning("No valid image files found.")
+                elif not plan.pages and not write_images:
+                    st.warning("No page can be paired as V/H; nothing to OCR.")
                 else:
-                    output_folder, result_csv = run_pipeline(Path(temp_dir), all_images, base_name)
+                    output_folder, result_csv, summary, previews, quality_issues = run_pipeline(
+                        Path(temp_dir), plan.pages, base_name,
+                        ocr_mode=ocr_mode, montage_tiles=int(montage_tiles), workers=int(workers),
+                        write_images=write_images, vh_labels=plan.labels, output_profile=output_profile,
+                        redact_only=unpairable
+                    )
+                    summary.update(plan.stats)
                     zip_path = Path(temp_dir) / f"{base_name}_output.zip"
                     zip_folder(output_folder, zip_path)
                     st.success("✅ Processing complete!")
-                    show_image_gallery(output_folder)
+                    show_run_summary(summary)
+                    show_quality_issues(quality_issues)
+                    show_image_gallery(previews)
                     with open(zip_path, "rb") as zf:
                         st.download_button("🖼️ Download Processed Images", zf, file_name=zip_path.name)
             except Exception as e:
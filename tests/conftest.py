@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app runs from src/ (streamlit run src/streamlit_app.py); import its packages the same way
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import pytest
+
+from ocr_process import deskew
+from ocr_process.sheet_templates import DEFAULT_TEMPLATE, SheetTemplate, header_signature
+
+NO_SIGNATURES = {DEFAULT_TEMPLATE.name: DEFAULT_TEMPLATE}
+
+
+def make_page(height: int = 1400, width: int = 1000) -> np.ndarray:
+    """Portrait form: a header bar on the left, then text lines over the top half (top-heavy)."""
+    page = np.full((height, width), 255, np.uint8)
+    cv2.rectangle(page, (40, 30), (width // 2, 110), 0, -1)
+    cv2.putText(page, "RFI SHEET", (width // 2 + 40, 95), cv2.FONT_HERSHEY_SIMPLEX, 2.0, 0, 4)
+    for i, y in enumerate(range(180, height // 2 + 100, 42)):
+        text = f"{i:02d}  X 0.{i * 37 % 1000:03d}  Y 4.{i * 91 % 1000:03d}  RFI {12345 + i}"
+        cv2.putText(page, text, (60, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    return page
+
+
+def skew_page(page: np.ndarray, angle: float) -> np.ndarray:
+    height, width = page.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(page, matrix, (width, height), flags=cv2.INTER_LINEAR, borderValue=255)
+
+
+def test_straight_page_is_left_alone():
+    orientation, skew = deskew.estimate_rotation(make_page(), NO_SIGNATURES)
+    assert orientation == 0
+    assert abs(skew) < deskew.MIN_SKEW
+    assert not deskew.needs_correction(orientation, skew)
+
+
+def test_blank_page_is_left_alone():
+    page = np.full((1400, 1000), 255, np.uint8)
+    assert deskew.estimate_rotation(page, NO_SIGNATURES) == (0, 0.0)
+
+
+def test_single_line_page_is_left_alone():
+    page = np.full((1400, 1000), 255, np.uint8)
+    cv2.putText(page, "page 1", (100, 300), cv2.FONT_HERSHEY_SIMPLEX, 2.0, 0, 3)
+    assert deskew.estimate_rotation(page, NO_SIGNATURES) == (0, 0.0)
+
+
+@pytest.mark.parametrize("angle", [-4.0, -2.5, -1.0, -0.75, 0.75, 1.5, 3.0, 4.0])
+def test_skewed_page_is_levelled_not_turned(angle):
+    orientation, skew = deskew.estimate_rotation(skew_page(make_page(), angle), NO_SIGNATURES)
+    assert orientation == 0
+    assert skew == pytest.approx(-angle, abs=0.3)
+    assert deskew.needs_correction(orientation, skew)
+
+
+@pytest.mark.parametrize("turn, expected", [
+    (cv2.ROTATE_90_CLOCKWISE, 90), (cv2.ROTATE_180, 180), (cv2.ROTATE_90_COUNTERCLOCKWISE, 270),
+])
+def test_quarter_turned_page_without_signatures(turn, expected):
+    orientation, skew = deskew.estimate_rotation(cv2.rotate(make_page(), turn), NO_SIGNATURES)
+    assert orientation == expected
+    assert abs(skew) < deskew.MIN_SKEW
+
+
+@pytest.mark.parametrize("turn, expected", [
+    (None, 0), (cv2.ROTATE_90_CLOCKWISE, 90), (cv2.ROTATE_180, 180), (cv2.ROTATE_90_COUNTERCLOCKWISE, 270),
+])
+def test_quarter_turned_page_with_signatures(turn, expected):
+    page = make_page()
+    templates = {"sheet": SheetTemplate("sheet", signature=header_signature(page))}
+    turned = page if turn is None else cv2.rotate(page, turn)
+    assert deskew.estimate_rotation(turned, templates)[0] == expected
+
+
+def test_correct_page_restores_a_turned_page():
+    page = make_page()
+    turned = cv2.rotate(page, cv2.ROTATE_90_CLOCKWISE)
+    orientation, skew = deskew.estimate_rotation(turned, NO_SIGNATURES)
+    assert np.array_equal(deskew.correct_page(turned, orientation, skew), page)
@@ -0,0 +1,123 @@
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from ocr_process.image_processor import (
+    DECODE_MODES, ROI_Y_COORDS, ROI_Y_HEADER_LINES, decode_page, decode_roi_rows, is_blank_roi, process_roi,
+    threshold_roi_stack, tight_crop
+)
+
+
+def make_roi_y(values: int = 4, rule: bool = False, factor: int = 1) -> np.ndarray:
+    """
+    Thresholded ROI_Y: the two table header lines, `values` value lines and optionally
+    a table rule, downscaled by `factor` as a reduced decode would.
+    """
+    _, _, w, h = ROI_Y_COORDS
+    roi = np.full((h, w), 255, np.uint8)
+    lines = ["Ref Y", "(mm)"] + [f"{12.5 + i:.2f}" for i in range(values)]
+    for i, text in enumerate(lines):
+        cv2.putText(roi, text, (8, 20 + 24 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 2)
+    if rule:
+        roi[:, w - 10] = 0
+    return process_roi(cv2.resize(roi, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA))
+
+
+def test_header_only_roi_is_blank():
+    assert is_blank_roi(make_roi_y(values=0), header_lines=ROI_Y_HEADER_LINES)
+
+
+def test_roi_with_values_is_not_blank():
+    assert not is_blank_roi(make_roi_y(), header_lines=ROI_Y_HEADER_LINES)
+
+
+def test_lines_merged_by_a_table_rule_are_not_blank():
+    # The rule joins every line into one span: the header can't be told apart from the values
+    assert not is_blank_roi(make_roi_y(rule=True), header_lines=ROI_Y_HEADER_LINES)
+
+
+@pytest.mark.parametrize("factor", [2, 4])
+def test_blank_gate_scales_with_the_decode_factor(factor):
+    # At 1/4 scale text lines are 2 px tall and glyph strokes a few pixels
+    assert is_blank_roi(make_roi_y(values=0, factor=factor), header_lines=ROI_Y_HEADER_LINES, factor=factor)
+    assert not is_blank_roi(make_roi_y(factor=factor), header_lines=ROI_Y_HEADER_LINES, factor=factor)
+    crop, dropped = tight_crop(make_roi_y(factor=factor), header_lines=ROI_Y_HEADER_LINES, factor=factor)
+    assert dropped == ROI_Y_HEADER_LINES and crop.any()
+
+
+def test_roi_stack_thresholds_like_process_roi():
+    # Channels around the threshold, where a rounding difference would flip pixels
+    rng = np.random.default_rng(0)
+    crops = rng.integers(0, 64, (300, 40, 120, 3), dtype=np.uint8)
+    expected = np.stack([process_roi(crop) for crop in crops])
+    assert np.array_equal(threshold_roi_stack(crops), expected)
+    gray = crops[..., 1].copy()
+    assert np.array_equal(threshold_roi_stack(gray), np.stack([process_roi(crop) for crop in gray]))
+
+
+@pytest.mark.parametrize("mode", list(DECODE_MODES))
+def test_partial_jpeg_decode_matches_the_full_page_quietly(tmp_path, capfd, mode):
+    rng = np.random.default_rng(0)
+    page = cv2.GaussianBlur(rng.integers(0, 256, (1203, 917, 3), dtype=np.uint8), (9, 9), 3)
+    path = tmp_path / "page.jpg"
+    cv2.imwrite(str(path), page)
+
+    partial_page, partial = decode_roi_rows(path, [(0, 0, 917, 500)], mode=mode)
+    full_page = decode_page(path, mode)
+    assert partial
+    assert partial_page.shape[1:] == full_page.shape[1:] and partial_page.shape[0] < full_page.shape[0]
+    # Rows above the last decoded MCU row's chroma neighbours are identical
+    rows = partial_page.shape[0] - 16
+    assert np.array_equal(partial_page[:rows], full_page[:rows])
+    assert capfd.readouterr().err == ""
+
+
+def tiled_tiff(page: np.ndarray, tile: int = 64) -> bytes:
+    """An uncompressed, little-endian tiled RGB TIFF (cv2.imwrite only writes strips)."""
+    h, w = page.shape[:2]
+    tiles = []
+    for ty in range(0, h, tile):
+        for tx in range(0, w, tile):
+            block = np.zeros((tile, tile, 3), np.uint8)
+            part = page[ty:ty + tile, tx:tx + tile, ::-1]
+            block[:part.shape[0], :part.shape[1]] = part
+            tiles.append(block.tobytes())
+    entries = [(256, 4, 1, w), (257, 4, 1, h), (258, 3, 3, "bits"), (259, 3, 1, 1), (262, 3, 1, 2),
+               (277, 3, 1, 3), (284, 3, 1, 1), (322, 3, 1, tile), (323, 3, 1, tile),
+               (324, 4, len(tiles), "offsets"), (325, 4, len(tiles), "counts")]
+    bits = 8 + 2 + 12 * len(entries) + 4
+    at = {"bits": bits, "offsets": bits + 6, "counts": bits + 6 + 4 * len(tiles)}
+    data_at = at["counts"] + 4 * len(tiles)
+
+    out = bytearray(b"II*\x00" + struct.pack("<IH", 8, len(entries)))
+    for tag, kind, count, value in entries:
+        value = at.get(value, value)
+        out += struct.pack("<HHIHH" if kind == 3 and count == 1 else "<HHII", tag, kind, count, value,
+                           *((0,) if kind == 3 and count == 1 else ()))
+    out += struct.pack("<I3H", 0, 8, 8, 8)
+    out += struct.pack(f"<{len(tiles)}I", *(data_at + i * len(tiles[0]) for i in range(len(tiles))))
+    out += struct.pack(f"<{len(tiles)}I", *(len(t) for t in tiles))
+    return bytes(out + b"".join(tiles))
+
+
+@pytest.mark.parametrize("layout", ["strips", "tiles"])
+@pytest.mark.parametrize("mode", list(DECODE_MODES))
+def test_partial_tiff_decode_matches_the_full_page_quietly(tmp_path, capfd, mode, layout):
+    rng = np.random.default_rng(0)
+    page = cv2.GaussianBlur(rng.integers(0, 256, (1203, 917, 3), dtype=np.uint8), (9, 9), 3)
+    path = tmp_path / "page.tiff"
+    if layout == "strips":
+        cv2.imwrite(str(path), page)  # LZW strips
+    else:
+        path.write_bytes(tiled_tiff(page))
+
+    partial_page, partial = decode_roi_rows(path, [(0, 0, 917, 500)], mode=mode)
+    full_page = decode_page(path, mode)
+    assert partial
+    assert partial_page.shape[1:] == full_page.shape[1:] and partial_page.shape[0] < full_page.shape[0]
+    # Reduced modes resample the last decoded row against the next, missing, one
+    rows = partial_page.shape[0] - 1
+    assert np.array_equal(partial_page[:rows], full_page[:rows])
+    assert capfd.readouterr().err == ""
@@ -0,0 +1,285 @@
+import random
+import re
+
+import pytest
+
+from black_roi.jpeg_redact import redact_jpeg
+
+# --- Synthetic Baseline Encoder ---
+# Random quantized coefficients are Huffman-coded with the Annex K tables, so the
+# redaction is checked on real-world code lengths without any image library.
+DC_BITS = {0: (0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0), 1: (0, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0)}
+AC_BITS = {0: (0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7D), 1: (0, 2, 1, 2, 4, 4, 3, 4, 7, 5, 4, 4, 0, 1, 2, 0x77)}
+# The Annex K AC tables list their short codes first, then the remaining symbols in ascending order
+AC_HEAD = {
+    0: (0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06, 0x13, 0x51, 0x61, 0x07,
+        0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xA1, 0x08, 0x23, 0x42, 0xB1, 0xC1, 0x15, 0x52, 0xD1, 0xF0,
+        0x24, 0x33, 0x62, 0x72, 0x82),
+    1: (0x00, 0x01, 0x02, 0x03, 0x11, 0x04, 0x05, 0x21, 0x31, 0x06, 0x12, 0x41, 0x51, 0x07, 0x61, 0x71,
+        0x13, 0x22, 0x32, 0x81, 0x08, 0x14, 0x42, 0x91, 0xA1, 0xB1, 0xC1, 0x09, 0x23, 0x33, 0x52, 0xF0,
+        0x15, 0x62, 0x72, 0xD1, 0x0A, 0x16, 0x24, 0x34, 0xE1, 0x25, 0xF1),
+}
+AC_SYMBOLS = [0x00, 0xF0] + [run << 4 | size for run in range(16) for size in range(1, 11)]
+DC_QUANT = {0: 10, 1: 6}  # luma's doesn't divide 1024: black is clamped, not exact
+
+SAMPLINGS = {"gray": None, "4:4:4": (1, 1), "4:2:2": (2, 1), "4:2:0": (2, 2)}
+
+
+def huffman_spec(table_class, table_id):
+    """(code-length counts, symbols) of an Annex K table."""
+    if table_class == 0:
+        return DC_BITS[table_id], tuple(range(12))
+    head = AC_HEAD[table_id]
+    return AC_BITS[table_id], head + tuple(sorted(set(AC_SYMBOLS) - set(head)))
+
+
+def huffman_codes(spec):
+    """symbol -> (code, length) of a canonical table."""
+    bits, symbols = spec
+    codes, code, symbols = {}, 0, iter(symbols)
+    for length, count in enumerate(bits, 1):
+        for _ in range(count):
+            codes[next(symbols)] = (code, length)
+            code += 1
+        code <<= 1
+    return codes
+
+
+class BitWriter:
+    def __init__(self):
+        self.out, self.value, self.length = bytearray(), 0, 0
+
+    def write(self, value, length):
+        self.value, self.length = (self.value << length) | value, self.length + length
+        while self.length >= 8:
+            self.length -= 8
+            byte = (self.value >> self.length) & 0xFF
+            self.out += b"\xff\x00" if byte == 0xFF else bytes([byte])
+        self.value &= (1 << self.length) - 1
+
+    def flush(self):
+        if self.length:
+            self.write((1 << (8 - self.length)) - 1, 8 - self.length)
+
+
+def magnitude(value):
+    size = abs(value).bit_length()
+    return size, value if value >= 0 else value + (1 << size) - 1
+
+
+def random_block(rng):
+    """Zigzag-ordered quantized coefficients, with long zero runs (ZRL) and early EOBs."""
+    block = [rng.randint(-40, 40)] + [0] * 63
+    k = 1 + rng.choice((0, 0, 1, 3, 17, 20))
+    while k < 64 and rng.random() > 0.08:
+        block[k] = rng.choice((-1, 1)) * rng.randint(1, 60)
+        k += 1 + rng.choice((0, 0, 1, 2, 5, 16, 33))
+    return block
+
+
+def layout(width, height, sampling):
+    """Components as (id, h, v, table id), the MCU size and the MCU grid."""
+    if sampling is None:
+        return [(1, 1, 1, 0)], 8, 8, -(-width // 8), -(-height // 8)
+    h, v = sampling
+    components = [(1, h, v, 0), (2, 1, 1, 1), (3, 1, 1, 1)]
+    return components, 8 * h, 8 * v, -(-width // (8 * h)), -(-height // (8 * v))
+
+
+def encode_jpeg(width, height, sampling, restart_interval, seed=0):
+    """A baseline JPEG of random blocks, and its coefficients: [mcu][block] in coding order."""
+    rng = random.Random(seed)
+    components, _, _, mcus_x, mcus_y = layout(width, height, sampling)
+    header = bytearray(b"\xff\xd8")
+    for table_id, dc_quant in DC_QUANT.items():
+        header += b"\xff\xdb\x00\x43" + bytes([table_id, dc_quant] + [12] * 63)
+    header += b"\xff\xc0" + (8 + 3 * len(components)).to_bytes(2, "big") + b"\x08"
+    header += height.to_bytes(2, "big") + width.to_bytes(2, "big") + bytes([len(components)])
+    for component_id, h, v, table_id in components:
+        header += bytes([component_id, h << 4 | v, table_id])
+    for table_class in (0, 1):
+        for table_id in (0, 1):
+            bits, symbols = huffman_spec(table_class, table_id)
+            header += b"\xff\xc4" + (19 + len(symbols)).to_bytes(2, "big")
+            header += bytes([table_class << 4 | table_id, *bits, *symbols])
+    if restart_interval:
+        header += b"\xff\xdd\x00\x04" + restart_interval.to_bytes(2, "big")
+    header += b"\xff\xda" + (6 + 2 * len(components)).to_bytes(2, "big") + bytes([len(components)])
+    for component_id, _, _, table_id in components:
+        header += bytes([component_id, table_id << 4 | table_id])
+    header += b"\x00\x3f\x00"
+
+    dc_codes = {table_id: huffman_codes(huffman_spec(0, table_id)) for table_id in (0, 1)}
+    ac_codes = {table_id: huffman_codes(huffman_spec(1, table_id)) for table_id in (0, 1)}
+    writer, mcus = BitWriter(), []
+    predictors = [0] * len(components)
+    for mcu in range(mcus_x * mcus_y):
+        if restart_interval and mcu and mcu % restart_interval == 0:
+            writer.flush()
+            writer.out += bytes([0xFF, 0xD0 + (mcu // restart_interval - 1) % 8])
+            predictors = [0] * len(components)
+        blocks = []
+        for index, (_, h, v, table_id) in enumerate(components):
+            for _ in range(h * v):
+                block = random_block(rng)
+                blocks.append(block)
+                size, bits = magnitude(block[0] - predictors[index])
+                predictors[index] = block[0]
+                writer.write(*dc_codes[table_id][size])
+                writer.write(bits, size)
+                run = 0
+                for value in block[1:]:
+                    if not value:
+                        run += 1
+                        continue
+                    while run > 15:
+                        writer.write(*ac_codes[table_id][0xF0])
+                        run -= 16
+                    size, bits = magnitude(value)
+                    writer.write(*ac_codes[table_id][run << 4 | size])
+                    writer.write(bits, size)
+                    run = 0
+                if run:
+                    writer.write(*ac_codes[table_id][0x00])
+        mcus.append(blocks)
+    writer.flush()
+    return bytes(header + writer.out + b"\xff\xd9"), mcus
+
+
+# --- Independent Decoder ---
+def decode_coefficients(data, width, height, sampling, restart_interval):
+    """Entropy-decode a file written by encode_jpeg (headers are left untouched by redaction)."""
+    components, _, _, mcus_x, mcus_y = layout(width, height, sampling)
+    decoders = {(table_class, table_id): {(length, code): symbol for symbol, (code, length)
+                                          in huffman_codes(huffman_spec(table_class, table_id)).items()}
+                for table_class in (0, 1) for table_id in (0, 1)}
+    scan_start = data.index(b"\xff\xda") + 2 + int.from_bytes(data[data.index(b"\xff\xda") + 2:][:2], "big")
+    scan = data[scan_start:data.rindex(b"\xff\xd9")]
+    segments = re.split(rb"\xff[\xd0-\xd7]", scan) if restart_interval else [scan]
+    interval = restart_interval or mcus_x * mcus_y
+    assert len(segments) == -(-mcus_x * mcus_y // interval)
+
+    mcus = []
+    for segment in segments:
+        bits = "".join(f"{byte:08b}" for byte in segment.replace(b"\xff\x00", b"\xff"))
+        pos, predictors = 0, [0] * len(components)
+
+        def read(count):
+            nonlocal pos
+            pos += count
+            return int(bits[pos - count:pos], 2) if count else 0
+
+        def symbol(table):
+            nonlocal pos
+            code, length = 0, 0
+            while (length, code) not in table:
+                code, length = code << 1 | int(bits[pos]), length + 1
+                pos += 1
+            return table[length, code]
+
+        def value(size):
+            raw = read(size)
+            return raw - (1 << size) + 1 if size and raw < 1 << (size - 1) else raw
+
+        for _ in range(min(interval, mcus_x * mcus_y - len(mcus))):
+            blocks = []
+            for index, (_, h, v, table_id) in enumerate(components):
+                for _ in range(h * v):
+                    predictors[index] += value(symbol(decoders[0, table_id]))
+                    block, k = [predictors[index]] + [0] * 63, 1
+                    while k < 64:
+                        run_size = symbol(decoders[1, table_id])
+                        if run_size == 0x00:
+                            break
+                        k += run_size >> 4
+                        if run_size & 15:
+                            block[k] = value(run_size & 15)
+                        k += 1
+                    blocks.append(block)
+            mcus.append(blocks)
+        assert set(bits[pos:]) <= {"1"} and len(bits) - pos < 8  # only padding left
+    return mcus
+
+
+def expected_mcus(width, height, sampling, regions):
+    _, mcu_width, mcu_height, mcus_x, _ = layout(width, height, sampling)
+    targets = set()
+    for x, y, w, h in regions:
+        right, bottom = min(width, x + w), min(height, y + h)
+        for row in range(max(0, y) // mcu_height, (bottom - 1) // mcu_height + 1):
+            for column in range(max(0, x) // mcu_width, (right - 1) // mcu_width + 1):
+                targets.add(row * mcus_x + column)
+    return targets
+
+
+WIDTH, HEIGHT = 83, 61  # not a whole number of MCUs
+REGIONS = [(5, 7, 3, 2), (30, 20, 25, 17), (70, 50, 40, 40)]  # inside one block, several MCUs, past the edge
+
+
+@pytest.mark.parametrize("restart_interval", [0, 1, 3, 7])
+@pytest.mark.parametrize("sampling", list(SAMPLINGS))
+def test_only_the_regions_mcus_are_blackened(sampling, restart_interval):
+    data, original = encode_jpeg(WIDTH, HEIGHT, SAMPLINGS[sampling], restart_interval)
+    redacted = redact_jpeg(data, REGIONS)
+    assert redacted is not None
+    assert decode_coefficients(data, WIDTH, HEIGHT, SAMPLINGS[sampling], restart_interval) == original
+
+    targets = expected_mcus(WIDTH, HEIGHT, SAMPLINGS[sampling], REGIONS)
+    components, *_ = layout(WIDTH, HEIGHT, SAMPLINGS[sampling])
+    luma_blocks = components[0][1] * components[0][2]
+    for mcu, (before, after) in enumerate(zip(original, decode_coefficients(
+            redacted, WIDTH, HEIGHT, SAMPLINGS[sampling], restart_interval))):
+        if mcu not in targets:
+            assert after == before, f"MCU {mcu} changed"
+            continue
+        for index, block in enumerate(after):
+            assert block[1:] == [0] * 63
+            if index < luma_blocks:
+                assert -2048 < block[0] * DC_QUANT[0] <= -1024  # black, clamped by decoders
+            else:
+                assert block[0] == 0  # neutral chroma
+
+
+def test_blocks_outside_the_regions_keep_their_bytes():
+    data, _ = encode_jpeg(WIDTH, HEIGHT, SAMPLINGS["4:2:0"], 0)
+    redacted = redact_jpeg(data, [(70, 50, 5, 5)])  # a late MCU: the scan before it is copied
+    assert redacted[:len(data) // 2] == data[:len(data) // 2]
+    assert redact_jpeg(data, [(200, 200, 5, 5)]) == data
+
+
+def test_unsupported_files_are_left_to_the_full_path():
+    data, _ = encode_jpeg(WIDTH, HEIGHT, SAMPLINGS["4:2:0"], 0)
+    progressive = data.replace(b"\xff\xc0", b"\xff\xc2", 1)
+    assert redact_jpeg(progressive, REGIONS) is None
+    assert redact_jpeg(b"not a jpeg", REGIONS) is None
+
+
+@pytest.mark.parametrize("restart_interval", [0, 3])
+@pytest.mark.parametrize("sampling", list(SAMPLINGS))
+def test_decoded_page_is_black_inside_and_unchanged_outside(sampling, restart_interval):
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+    data, _ = encode_jpeg(WIDTH, HEIGHT, SAMPLINGS[sampling], restart_interval)
+    redacted = redact_jpeg(data, REGIONS)
+    _, mcu_width, mcu_height, mcus_x, _ = layout(WIDTH, HEIGHT, SAMPLINGS[sampling])
+
+    inside = np.zeros((HEIGHT, WIDTH), bool)
+    for mcu in expected_mcus(WIDTH, HEIGHT, SAMPLINGS[sampling], REGIONS):
+        row, column = divmod(mcu, mcus_x)
+        inside[row * mcu_height:(row + 1) * mcu_height, column * mcu_width:(column + 1) * mcu_width] = True
+
+    def decode(blob, flags):
+        return cv2.imdecode(np.frombuffer(blob, np.uint8), flags)
+
+    # Luma needs no upsampling: exact on both sides of the MCU edges
+    before, after = decode(data, cv2.IMREAD_GRAYSCALE), decode(redacted, cv2.IMREAD_GRAYSCALE)
+    assert (after[inside] == 0).all()
+    assert np.array_equal(after[~inside], before[~inside])
+
+    # Upsampled chroma blends across MCU edges: compare a chroma sample away from them
+    before, after = decode(data, cv2.IMREAD_COLOR), decode(redacted, cv2.IMREAD_COLOR)
+    kernel = np.ones((5, 5), np.uint8)
+    core = cv2.erode(inside.astype(np.uint8), kernel, borderType=cv2.BORDER_REPLICATE).astype(bool)
+    near = cv2.dilate(inside.astype(np.uint8), kernel).astype(bool)
+    assert after[core].max() <= 1
+    assert np.array_equal(after[~near], before[~near])
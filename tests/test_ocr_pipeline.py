@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from ocr_process import ocr_pipeline
+from ocr_process.sheet_templates import SheetTemplate
+
+
+def write_pages(folder: Path, count: int = 6) -> list:
+    folder.mkdir()
+    paths = []
+    for i in range(count):
+        page = np.full((1400, 1000, 3), 255, np.uint8)
+        cv2.putText(page, f"page {i}", (100, 300), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (0, 0, 0), 3)
+        paths.append(folder / f"p{i}{'.jpg' if i % 2 else '.png'}")
+        cv2.imwrite(str(paths[-1]), page)
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_writer_threads_save_the_same_pages(tmp_path, monkeypatch, workers):
+    files = write_pages(tmp_path / "in")
+    monkeypatch.setattr(ocr_pipeline, "WRITER_WORKERS", 1)
+    ocr_pipeline.ocr_image_files(files, input_folder=tmp_path / "in", output_folder=tmp_path / "serial",
+                                 redact_only=frozenset(files))
+    monkeypatch.setattr(ocr_pipeline, "WRITER_WORKERS", workers)
+    _, stats = ocr_pipeline.ocr_image_files(files, input_folder=tmp_path / "in", output_folder=tmp_path / "out",
+                                            redact_only=frozenset(files))
+
+    assert stats["reencoded_pages"] + stats["lossless_jpeg_pages"] == len(files)
+    for path in files:
+        serial, threaded = (cv2.imread(str(tmp_path / folder / path.name)) for folder in ("serial", "out"))
+        assert serial is not None and np.array_equal(serial, threaded)
+
+
+def test_template_without_regions_redacts_nothing(tmp_path, monkeypatch):
+    files = write_pages(tmp_path / "in", count=2)
+    templates = {"plain": SheetTemplate("plain", redact=())}
+    monkeypatch.setattr(ocr_pipeline, "get_templates", lambda: templates)
+    ocr_pipeline.ocr_image_files(files, input_folder=tmp_path / "in", output_folder=tmp_path / "out",
+                                 redact_only=frozenset(files))
+
+    for path in files:  # PNG re-encoded, JPEG rewritten losslessly
+        assert np.array_equal(cv2.imread(str(tmp_path / "out" / path.name)), cv2.imread(str(path)))
@@ -0,0 +1,26 @@
+import cv2
+import numpy as np
+
+from ocr_process.quality_check import assess_rois
+
+
+def text_roi(factor: int = 1) -> np.ndarray:
+    roi = np.full((160, 480), 255, np.uint8)
+    for i in range(5):
+        cv2.putText(roi, f"{12.5 + i:.3f}  {4.25 * i:.3f}", (10, 28 + 30 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 0, 1)
+    return cv2.resize(roi, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+
+
+def test_full_resolution_text_passes():
+    assert assess_rois([text_roi()]).verdict == "ok"
+
+
+def test_reduced_decode_is_not_rejected_for_grayed_strokes():
+    # Thin strokes average above INK_LEVEL at 1/4 scale
+    report = assess_rois([text_roi(4)], factor=4)
+    assert report.density < 0.001
+    assert report.verdict != "reject"
+
+
+def test_empty_page_is_rejected():
+    assert assess_rois([np.full((160, 480), 255, np.uint8)]).verdict == "reject"
@@ -0,0 +1,23 @@
+import threading
+import time
+
+import numpy as np
+
+from ocr_process import text_extractor
+
+
+def test_subprocess_backend_overlaps_tesseract_calls(monkeypatch):
+    threads = set()
+
+    def image_to_string(image, config=""):
+        threads.add(threading.get_ident())
+        time.sleep(0.01)  # a tesseract process
+        return f" {int(image[0, 0])} "
+
+    monkeypatch.setattr(text_extractor, "OCR_BACKEND", "subprocess")
+    monkeypatch.setattr(text_extractor, "SUBPROCESS_WORKERS", 4)
+    monkeypatch.setattr(text_extractor.pytesseract, "image_to_string", image_to_string)
+    images = [np.full((8, 8), value, np.uint8) for value in range(12)]
+
+    assert text_extractor._recognize_many(images) == [str(value) for value in range(12)]
+    assert len(threads) > 1
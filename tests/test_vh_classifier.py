@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from ocr_process.vh_classifier import plan_pairs
+
+
+def test_suffixed_pages_pair_without_decoding():
+    # The files don't exist: without prototypes or suffix-less partners nothing may be decoded
+    pages = [Path("p1_V.jpg"), Path("p1_H.jpg"), Path("p2_H.jpg"), Path("p2_V.jpg")]
+    plan = plan_pairs(pages, prototypes={})
+    assert plan.pages == pages
+    assert plan.labels == {"p1_V": ("p1", "V"), "p1_H": ("p1", "H"), "p2_H": ("p2", "H"), "p2_V": ("p2", "V")}
+    assert plan.unpairable == []
+    assert plan.stats["vh_decoded_pages"] == 0
+
+
+def test_suffixless_page_without_partner_is_unpairable():
+    pages = [Path("scan.jpg"), Path("p1_V.jpg"), Path("p1_H.jpg")]
+    plan = plan_pairs(pages, prototypes={})
+    assert plan.pages == pages[1:]
+    assert [path for path, _ in plan.unpairable] == [Path("scan.jpg")]
+    assert plan.stats["vh_decoded_pages"] == 0
+
+
+def test_second_page_for_a_slot_is_unpairable():
+    pages = [Path("a/p1_V.jpg"), Path("b/p1_V.jpg"), Path("p1_H.jpg")]
+    plan = plan_pairs(pages, prototypes={})
+    assert plan.pages == [pages[0], pages[2]]
+    assert plan.unpairable == [(pages[1], "another page is already p1_V")]